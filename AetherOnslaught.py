@@ -1,735 +1,915 @@
-import pygame
-import random
-import os
-import json
-import math
-import sys
-
-# Debug flag to print more info
-DEBUG = True
-
-def debug_print(message):
-    if DEBUG:
-        print(message)
-
-# Initialize Pygame
-debug_print("Initializing Pygame...")
-try:
-    pygame.init()
-    pygame.mixer.init()
-except Exception as e:
-    debug_print(f"Error initializing Pygame: {e}")
-    input("Press Enter to exit...")
-    sys.exit(1)
-
-# Set up the display
-WIDTH = 800
-HEIGHT = 600
-debug_print("Setting up display...")
-try:
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Space Invaders")
-except Exception as e:
-    debug_print(f"Error setting up display: {e}")
-    input("Press Enter to exit...")
-    sys.exit(1)
-
-# Colors
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-RED = (255, 0, 0)
-YELLOW = (255, 255, 0)
-LIGHT_BLUE = (173, 216, 230)
-
-# Load images with explicit fallbacks
-debug_print("Loading images...")
-try:
-    background = pygame.image.load("background.png").convert()
-    background = pygame.transform.scale(background, (WIDTH, HEIGHT))
-except Exception as e:
-    debug_print(f"Failed to load background.png: {e}")
-    background = pygame.Surface((WIDTH, HEIGHT))
-    background.fill(BLACK)
-
-try:
-    player_img = pygame.image.load("player.png").convert_alpha()
-except Exception as e:
-    debug_print(f"Failed to load player.png: {e}")
-    player_img = pygame.Surface((50, 40))
-    player_img.fill(WHITE)
-
-try:
-    enemy_img = pygame.image.load("enemy.png").convert_alpha()
-except Exception as e:
-    debug_print(f"Failed to load enemy.png: {e}")
-    enemy_img = pygame.Surface((40, 30))
-    enemy_img.fill(RED)
-
-try:
-    bomber_img = pygame.image.load("bomber.png").convert_alpha()
-except Exception as e:
-    debug_print(f"Failed to load bomber.png: {e}")
-    bomber_img = pygame.Surface((40, 30))
-    bomber_img.fill(YELLOW)
-
-try:
-    elite_img = pygame.image.load("elite.png").convert_alpha()
-except Exception as e:
-    debug_print(f"Failed to load elite.png: {e}")
-    elite_img = pygame.Surface((40, 30))
-    elite_img.fill((0, 255, 0))
-
-try:
-    mega_img = pygame.image.load("mega.png").convert_alpha()
-except Exception as e:
-    debug_print(f"Failed to load mega.png: {e}")
-    mega_img = pygame.Surface((200, 150))
-    mega_img.fill((255, 0, 255))
-
-try:
-    bullet_img = pygame.image.load("bullet.png").convert_alpha()
-except Exception as e:
-    debug_print(f"Failed to load bullet.png: {e}")
-    bullet_img = pygame.Surface((5, 15))
-    bullet_img.fill(WHITE)
-
-try:
-    bomb_img = pygame.image.load("bomb.png").convert_alpha()
-except Exception as e:
-    debug_print(f"Failed to load bomb.png: {e}")
-    bomb_img = pygame.Surface((5, 15))
-    bomb_img.fill(YELLOW)
-
-try:
-    explosion_img = pygame.image.load("explosion.png").convert_alpha()
-except Exception as e:
-    debug_print(f"Failed to load explosion.png: {e}")
-    explosion_img = pygame.Surface((40, 40))
-    explosion_img.fill(RED)
-
-try:
-    title_img = pygame.image.load("title.png").convert_alpha()
-except Exception as e:
-    debug_print(f"Failed to load title.png: {e}")
-    title_img = pygame.Surface((450, 200))
-    title_img.fill(WHITE)
-
-# Load sounds
-debug_print("Loading sounds...")
-try:
-    bullet_sound = pygame.mixer.Sound("bullet.wav")
-except Exception as e:
-    debug_print(f"Failed to load bullet.wav: {e}")
-    bullet_sound = None
-
-try:
-    explosion_sound = pygame.mixer.Sound("explosion.wav")
-except Exception as e:
-    debug_print(f"Failed to load explosion.wav: {e}")
-    explosion_sound = None
-
-try:
-    bomb_drop_sound = pygame.mixer.Sound("bomb_drop.wav")
-except Exception as e:
-    debug_print(f"Failed to load bomb_drop.wav: {e}")
-    bomb_drop_sound = None
-
-try:
-    dive_sound = pygame.mixer.Sound("dive.wav")
-except Exception as e:
-    debug_print(f"Failed to load dive.wav: {e}")
-    dive_sound = None
-
-# Load background music
-debug_print("Loading background music...")
-try:
-    pygame.mixer.music.load("background_music.mp3")
-    pygame.mixer.music.set_volume(0.75)
-except Exception as e:
-    debug_print(f"Failed to load background_music.mp3: {e}")
-
-# Scale sprite images
-PLAYER_WIDTH, PLAYER_HEIGHT = 50, 40
-ENEMY_WIDTH, ENEMY_HEIGHT = 40, 30
-BOMBER_WIDTH, BOMBER_HEIGHT = 40, 30
-ELITE_WIDTH, ELITE_HEIGHT = 40, 30
-MEGA_WIDTH, MEGA_HEIGHT = 200, 150
-BULLET_WIDTH, BULLET_HEIGHT = 5, 15
-BOMB_WIDTH, BOMB_HEIGHT = 5, 15
-EXPLOSION_WIDTH, EXPLOSION_HEIGHT = 40, 40
-TITLE_WIDTH, TITLE_HEIGHT = 450, 200
-
-debug_print("Scaling images...")
-player_img = pygame.transform.scale(player_img, (PLAYER_WIDTH, PLAYER_HEIGHT))
-enemy_img = pygame.transform.scale(enemy_img, (ENEMY_WIDTH, ENEMY_HEIGHT))
-bomber_img = pygame.transform.scale(bomber_img, (BOMBER_WIDTH, BOMBER_HEIGHT))
-elite_img = pygame.transform.scale(elite_img, (ELITE_WIDTH, ELITE_HEIGHT))
-mega_img = pygame.transform.scale(mega_img, (MEGA_WIDTH, MEGA_HEIGHT))
-bullet_img = pygame.transform.scale(bullet_img, (BULLET_WIDTH, BULLET_HEIGHT))
-bomb_img = pygame.transform.scale(bomb_img, (BOMB_WIDTH, BOMB_HEIGHT))
-explosion_img = pygame.transform.scale(explosion_img, (EXPLOSION_WIDTH, EXPLOSION_HEIGHT))
-title_img = pygame.transform.scale(title_img, (TITLE_WIDTH, TITLE_HEIGHT))
-
-# Scale player image for lives display
-LIVES_ICON_WIDTH, LIVES_ICON_HEIGHT = 25, 20
-lives_icon = pygame.transform.scale(player_img, (LIVES_ICON_WIDTH, LIVES_ICON_HEIGHT))
-
-# High score handling
-HIGH_SCORE_FILE = "high_scores.json"
-def load_high_scores():
-    try:
-        with open(HIGH_SCORE_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        return []
-
-def save_high_scores(scores):
-    with open(HIGH_SCORE_FILE, 'w') as f:
-        json.dump(scores, f)
-
-def update_high_scores(score, initials):
-    scores = load_high_scores()
-    scores.append({"initials": initials, "score": score})
-    scores.sort(key=lambda x: x["score"], reverse=True)
-    return scores[:5]
-
-# Display start screen with high scores
-def show_start_screen(high_scores):
-    debug_print("Showing start screen...")
-    clock = pygame.time.Clock()
-    screen.blit(background, (0, 0))
-    
-    screen.blit(title_img, (WIDTH//2 - TITLE_WIDTH//2, HEIGHT//2 - 250))
-    
-    font = pygame.font.SysFont('Arial', 25, bold=True)
-    high_score_title = font.render("High Scores", True, LIGHT_BLUE)
-    screen.blit(high_score_title, (WIDTH//2 - high_score_title.get_width()//2, HEIGHT//2 - 20))
-    
-    for i, entry in enumerate(high_scores[:5]):
-        score_text = font.render(f"{entry['initials']} - {entry['score']}", True, LIGHT_BLUE)
-        screen.blit(score_text, (WIDTH//2 - score_text.get_width()//2, HEIGHT//2 + 10 + i * 30))
-    
-    start_font = pygame.font.SysFont('Arial', 30, bold=True)
-    start_text = start_font.render("Press S to Start", True, YELLOW)
-    start_rect = start_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 200))
-    
-    waiting = True
-    while waiting:
-        current_time = pygame.time.get_ticks()
-        if (current_time // 500) % 2 == 0:
-            screen.blit(start_text, start_rect)
-        
-        pygame.display.flip()
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_s:
-                    debug_print("S pressed, exiting start screen...")
-                    waiting = False
-        
-        screen.blit(background, (0, 0))
-        screen.blit(title_img, (WIDTH//2 - TITLE_WIDTH//2, HEIGHT//2 - 250))
-        screen.blit(high_score_title, (WIDTH//2 - high_score_title.get_width()//2, HEIGHT//2 - 20))
-        for i, entry in enumerate(high_scores[:5]):
-            score_text = font.render(f"{entry['initials']} - {entry['score']}", True, LIGHT_BLUE)
-            screen.blit(score_text, (WIDTH//2 - score_text.get_width()//2, HEIGHT//2 + 10 + i * 30))
-        
-        clock.tick(60)
-
-# Display enter initials screen
-def show_enter_initials_screen(score):
-    debug_print("Showing enter initials screen...")
-    screen.blit(background, (0, 0))
-    font = pygame.font.SysFont('Arial', 48, bold=True)
-    prompt_text = font.render(f"New High Score: {score}", True, WHITE)
-    instruction_text = font.render("Enter 3 initials:", True, WHITE)
-    initials = ""
-    
-    waiting = True
-    while waiting:
-        screen.blit(background, (0, 0))
-        screen.blit(prompt_text, (WIDTH//2 - prompt_text.get_width()//2, HEIGHT//2 - 50))
-        screen.blit(instruction_text, (WIDTH//2 - instruction_text.get_width()//2, HEIGHT//2 + 20))
-        initials_text = font.render(initials, True, WHITE)
-        screen.blit(initials_text, (WIDTH//2 - initials_text.get_width()//2, HEIGHT//2 + 80))
-        pygame.display.flip()
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN and len(initials) == 3:
-                    waiting = False
-                elif event.key == pygame.K_BACKSPACE:
-                    initials = initials[:-1]
-                elif len(initials) < 3 and event.key >= pygame.K_a and event.key <= pygame.K_z:
-                    initials += chr(event.key).upper()
-    
-    return initials
-
-# Display game over screen with play again option
-def show_game_over_screen(score):
-    debug_print("Showing game over screen...")
-    screen.blit(background, (0, 0))
-    font = pygame.font.SysFont('Arial', 48, bold=True)
-    game_over_text = font.render("GAME OVER", True, WHITE)
-    score_text = font.render(f"Final Score: {score}", True, WHITE)
-    play_again_text = font.render("Play Again? (Y/N)", True, WHITE)
-    screen.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, HEIGHT//2 - 100))
-    screen.blit(score_text, (WIDTH//2 - score_text.get_width()//2, HEIGHT//2 - 30))
-    screen.blit(play_again_text, (WIDTH//2 - play_again_text.get_width()//2, HEIGHT//2 + 40))
-    pygame.display.flip()
-    
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return False
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_y:
-                    return True
-                if event.key == pygame.K_n:
-                    return False
-    return False
-
-# Display end credits screen
-def show_end_credits():
-    debug_print("Showing end credits screen...")
-    screen.blit(background, (0, 0))
-    font = pygame.font.SysFont('Arial', 36, bold=True)
-    
-    credits_line1 = font.render("Programming and graphics by", True, WHITE)
-    credits_line2 = font.render("Brian Zimmerman using Grok", True, WHITE)
-    credits_line3 = font.render("Music arranged by", True, WHITE)
-    credits_line4 = font.render("Brian Zimmerman 2025", True, WHITE)
-    
-    screen.blit(credits_line1, (WIDTH//2 - credits_line1.get_width()//2, HEIGHT//2 - 100))
-    screen.blit(credits_line2, (WIDTH//2 - credits_line2.get_width()//2, HEIGHT//2 - 50))
-    screen.blit(credits_line3, (WIDTH//2 - credits_line3.get_width()//2, HEIGHT//2 + 20))
-    screen.blit(credits_line4, (WIDTH//2 - credits_line4.get_width()//2, HEIGHT//2 + 60))
-    
-    pygame.display.flip()
-    pygame.time.wait(5000)  # Display for 5 seconds before exiting
-
-# Main game function
-def play_game():
-    debug_print("Entering play_game()...")
-    try:
-        # Player properties
-        debug_print("Setting player properties...")
-        player_x = WIDTH // 2 - PLAYER_WIDTH // 2
-        player_y = HEIGHT - 100
-        player_speed = 10
-        lives = 3
-        player_explosion = None
-
-        # Bullet properties
-        debug_print("Setting bullet properties...")
-        bullet_speed = 7
-        bullets = []
-
-        # Bomb properties
-        debug_print("Setting bomb properties...")
-        bomb_speed = 5
-        bombs = []
-        BOMB_DROP_CHANCE = 0.0025
-        bombs_enabled = True
-
-        # Elite dive properties
-        debug_print("Setting elite dive properties...")
-        DIVE_CHANCE = 0.000625
-        DIVE_SPEED = 5
-
-        # Mega alien properties
-        debug_print("Setting mega alien properties...")
-        MEGA_BOMB_CHANCE = 0.01
-
-        # Explosion properties
-        debug_print("Setting explosion properties...")
-        explosions = []
-        EXPLOSION_DURATION = 30
-
-        # Enemy properties
-        debug_print("Setting enemy properties...")
-        BASE_ENEMY_SPEED = 2
-        enemy_speed = BASE_ENEMY_SPEED
-        SPEED_INCREASE = 0.2
-        enemies = []
-        ENEMY_ROWS = 3
-        ENEMY_COLS = 10
-        level = 1
-
-        # Game state
-        debug_print("Setting game state...")
-        paused = False
-        score = 0
-        clock = pygame.time.Clock()
-
-        # Create enemies
-        def create_enemies(level):
-            nonlocal enemies, enemy_speed
-            debug_print(f"Creating enemies for level {level}...")
-            enemies = []
-            if level == 10:
-                enemies.append({
-                    'x': WIDTH // 2 - MEGA_WIDTH // 2,
-                    'y': HEIGHT // 2 - MEGA_HEIGHT // 2,  # Mid-screen
-                    'type': "mega",
-                    'health': 20,
-                    'time': 0
-                })
-            else:
-                rows = min(5, ENEMY_ROWS + (level - 1) // 3)
-                for row in range(rows):
-                    for col in range(ENEMY_COLS):
-                        if level >= 7 and row == 0:
-                            enemy_type = "elite"
-                        elif level >= 4 and row == 0:
-                            enemy_type = "bomber"
-                        else:
-                            enemy_type = "normal"
-                        enemy = {
-                            'x': 75 + col * (ENEMY_WIDTH + 20),
-                            'y': 50 + row * (ENEMY_HEIGHT + 20),
-                            'direction': 1,
-                            'type': enemy_type,
-                            'diving': False,
-                            'original_x': 75 + col * (ENEMY_WIDTH + 20),
-                            'original_y': 50 + row * (ENEMY_HEIGHT + 20)
-                        }
-                        enemies.append(enemy)
-            enemy_speed = BASE_ENEMY_SPEED + (level - 1) * 0.1
-            debug_print(f"Enemies created: {len(enemies)}")
-
-        # Display level transition
-        def show_level_transition(level):
-            debug_print(f"Showing level transition for level {level}...")
-            screen.blit(background, (0, 0))
-            font = pygame.font.SysFont('Arial', 48, bold=True)
-            level_text = font.render(f"Level {level}", True, WHITE)
-            screen.blit(level_text, (WIDTH//2 - level_text.get_width()//2, HEIGHT//2 - 24))
-            pygame.display.flip()
-            pygame.time.wait(2000)
-
-        # Display pause screen
-        def show_pause_screen():
-            debug_print("Showing pause screen...")
-            overlay = pygame.Surface((WIDTH, HEIGHT))
-            overlay.set_alpha(128)
-            overlay.fill(BLACK)
-            screen.blit(overlay, (0, 0))
-            font = pygame.font.SysFont('Arial', 48, bold=True)
-            pause_text = font.render("PAUSED", True, WHITE)
-            instruction_text = font.render("Press P to continue", True, WHITE)
-            screen.blit(pause_text, (WIDTH//2 - pause_text.get_width()//2, HEIGHT//2 - 50))
-            screen.blit(instruction_text, (WIDTH//2 - instruction_text.get_width()//2, HEIGHT//2 + 20))
-            pygame.display.flip()
-
-        # Initial enemy creation
-        debug_print("Creating initial enemies...")
-        try:
-            create_enemies(level)
-            debug_print("Starting background music...")
-            if pygame.mixer.get_init():
-                pygame.mixer.music.play(-1)
-            else:
-                debug_print("Mixer not initialized, skipping music...")
-        except Exception as e:
-            debug_print(f"Error initializing game state: {e}")
-            pygame.quit()
-            input("Press Enter to exit...")
-            sys.exit(1)
-
-        # Game loop
-        debug_print("Entering game loop...")
-        running = True
-        while running:
-            try:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        running = False
-                    if event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_SPACE and not paused and not player_explosion:
-                            bullet = {
-                                'x': player_x + PLAYER_WIDTH // 2 - BULLET_WIDTH // 2,
-                                'y': player_y
-                            }
-                            bullets.append(bullet)
-                            if bullet_sound:
-                                bullet_sound.play()
-                        if event.key == pygame.K_p:
-                            paused = not paused
-                            if paused:
-                                if pygame.mixer.get_init():
-                                    pygame.mixer.music.pause()
-                                show_pause_screen()
-                            else:
-                                if pygame.mixer.get_init():
-                                    pygame.mixer.music.unpause()
-                        if event.key == pygame.K_b:
-                            bombs_enabled = not bombs_enabled
-                            debug_print(f"Bombs {'enabled' if bombs_enabled else 'disabled'}")
-
-                if paused:
-                    continue
-
-                # Player movement
-                keys = pygame.key.get_pressed()
-                if keys[pygame.K_LEFT] and player_x > 0 and not player_explosion:
-                    player_x -= player_speed
-                if keys[pygame.K_RIGHT] and player_x < WIDTH - PLAYER_WIDTH and not player_explosion:
-                    player_x += player_speed
-
-                # Update bullets
-                for bullet in bullets[:]:
-                    bullet['y'] -= bullet_speed
-                    if bullet['y'] < 0:
-                        bullets.remove(bullet)
-
-                # Update bombs
-                for bomb in bombs[:]:
-                    bomb['y'] += bomb_speed
-                    if bomb['y'] > HEIGHT:
-                        bombs.remove(bomb)
-                    if (not player_explosion and 
-                        bomb['x'] >= player_x and 
-                        bomb['x'] <= player_x + PLAYER_WIDTH and
-                        bomb['y'] >= player_y and 
-                        bomb['y'] <= player_y + PLAYER_HEIGHT):
-                        lives -= 1
-                        player_explosion = {
-                            'x': player_x,
-                            'y': player_y,
-                            'timer': EXPLOSION_DURATION
-                        }
-                        if explosion_sound:
-                            explosion_sound.play()
-                        bombs.remove(bomb)
-                        break
-
-                # Update explosions
-                for explosion in explosions[:]:
-                    explosion['timer'] -= 1
-                    if explosion['timer'] <= 0:
-                        explosions.remove(explosion)
-
-                # Update player explosion
-                if player_explosion:
-                    player_explosion['timer'] -= 1
-                    if player_explosion['timer'] <= 0:
-                        player_explosion = None
-                        player_x = WIDTH // 2 - PLAYER_WIDTH // 2
-                        if lives > 0:
-                            create_enemies(level)
-                            bullets.clear()
-                            bombs.clear()
-                        if lives <= 0:
-                            running = False
-
-                # Update enemies
-                for enemy in enemies[:]:
-                    if enemy['type'] == "mega":
-                        enemy['time'] += 0.05
-                        enemy['x'] = WIDTH // 2 + 350 * math.sin(enemy['time']) - MEGA_WIDTH // 2  # Side-to-side, centered
-                        # y stays fixed at HEIGHT // 2 - MEGA_HEIGHT // 2 from creation
-                        
-                        if random.random() < MEGA_BOMB_CHANCE and bombs_enabled:
-                            bomb = {
-                                'x': enemy['x'] + MEGA_WIDTH // 2 - BOMB_WIDTH // 2,
-                                'y': enemy['y'] + MEGA_HEIGHT
-                            }
-                            bombs.append(bomb)
-                            if bomb_drop_sound:
-                                bomb_drop_sound.play()
-
-                    elif enemy['type'] == "elite" and not enemy['diving'] and random.random() < DIVE_CHANCE:
-                        enemy['diving'] = True
-                        if dive_sound:
-                            dive_sound.play()
-
-                    if enemy.get('diving', False):
-                        enemy['y'] += DIVE_SPEED
-                        if (not player_explosion and 
-                            enemy['x'] >= player_x and 
-                            enemy['x'] <= player_x + PLAYER_WIDTH and
-                            enemy['y'] >= player_y and 
-                            enemy['y'] <= player_y + PLAYER_HEIGHT):
-                            lives -= 1
-                            player_explosion = {
-                                'x': player_x,
-                                'y': player_y,
-                                'timer': EXPLOSION_DURATION
-                            }
-                            if explosion_sound:
-                                explosion_sound.play()
-                            enemy['diving'] = False
-                            enemy['x'] = enemy['original_x']
-                            enemy['y'] = enemy['original_y']
-                            continue
-                        if enemy['y'] > HEIGHT:
-                            enemy['diving'] = False
-                            enemy['x'] = enemy['original_x']
-                            enemy['y'] = enemy['original_y']
-                    else:
-                        if enemy['type'] != "mega":
-                            enemy['x'] += enemy_speed * enemy['direction']
-                            if enemy['x'] <= 0 or enemy['x'] >= WIDTH - ENEMY_WIDTH:
-                                for e in enemies:
-                                    if not e.get('diving', False) and e['type'] != "mega":
-                                        e['direction'] *= -1
-                                        e['y'] += 20
-                                enemy_speed += SPEED_INCREASE
-
-                    if enemy['type'] == "bomber" and bombs_enabled and random.random() < BOMB_DROP_CHANCE:
-                        bomb = {
-                            'x': enemy['x'] + BOMBER_WIDTH // 2 - BOMB_WIDTH // 2,
-                            'y': enemy['y'] + BOMBER_HEIGHT
-                        }
-                        bombs.append(bomb)
-                        if bomb_drop_sound:
-                            bomb_drop_sound.play()
-
-                    for bullet in bullets[:]:
-                        if enemy['type'] == "mega":
-                            if (bullet['x'] >= enemy['x'] and 
-                                bullet['x'] <= enemy['x'] + MEGA_WIDTH and
-                                bullet['y'] >= enemy['y'] and 
-                                bullet['y'] <= enemy['y'] + MEGA_HEIGHT):
-                                enemy['health'] -= 1
-                                bullets.remove(bullet)
-                                # Add explosion on hit
-                                explosions.append({
-                                    'x': bullet['x'] - EXPLOSION_WIDTH // 2,
-                                    'y': bullet['y'] - EXPLOSION_HEIGHT // 2,
-                                    'timer': EXPLOSION_DURATION
-                                })
-                                if explosion_sound:
-                                    explosion_sound.play()
-                                if enemy['health'] <= 0:
-                                    explosions.append({
-                                        'x': enemy['x'] + MEGA_WIDTH // 2 - EXPLOSION_WIDTH // 2,
-                                        'y': enemy['y'] + MEGA_HEIGHT // 2 - EXPLOSION_HEIGHT // 2,
-                                        'timer': EXPLOSION_DURATION
-                                    })
-                                    if explosion_sound:
-                                        explosion_sound.play()
-                                    enemies.remove(enemy)
-                                    score += 100
-                                break
-                        else:
-                            if (bullet['x'] >= enemy['x'] and 
-                                bullet['x'] <= enemy['x'] + ENEMY_WIDTH and
-                                bullet['y'] >= enemy['y'] and 
-                                bullet['y'] <= enemy['y'] + ENEMY_HEIGHT):
-                                explosions.append({
-                                    'x': enemy['x'],
-                                    'y': enemy['y'],
-                                    'timer': EXPLOSION_DURATION
-                                })
-                                if explosion_sound:
-                                    explosion_sound.play()
-                                enemies.remove(enemy)
-                                bullets.remove(bullet)
-                                if enemy['type'] == "elite":
-                                    score += 20
-                                else:
-                                    score += 10
-                                break
-
-                if not enemies and not player_explosion:
-                    level += 1
-                    show_level_transition(level)
-                    create_enemies(level)
-                    bullets.clear()
-                    bombs.clear()
-
-                for enemy in enemies[:]:
-                    if not enemy.get('diving', False) and enemy['type'] != "mega" and enemy['y'] > HEIGHT - 100 and not player_explosion:
-                        lives -= 1
-                        player_explosion = {
-                            'x': player_x,
-                            'y': player_y,
-                            'timer': EXPLOSION_DURATION
-                        }
-                        if explosion_sound:
-                            explosion_sound.play()
-                        break
-
-                screen.blit(background, (0, 0))
-                
-                for explosion in explosions:
-                    screen.blit(explosion_img, (explosion['x'], explosion['y']))
-                
-                if not player_explosion:
-                    screen.blit(player_img, (player_x, player_y))
-                elif player_explosion:
-                    screen.blit(explosion_img, (player_explosion['x'], player_explosion['y']))
-                
-                for bullet in bullets:
-                    screen.blit(bullet_img, (bullet['x'], bullet['y']))
-                
-                for bomb in bombs:
-                    screen.blit(bomb_img, (bomb['x'], bomb['y']))
-                
-                for enemy in enemies:
-                    if enemy['type'] == "bomber":
-                        screen.blit(bomber_img, (enemy['x'], enemy['y']))
-                    elif enemy['type'] == "elite":
-                        screen.blit(elite_img, (enemy['x'], enemy['y']))
-                    elif enemy['type'] == "mega":
-                        screen.blit(mega_img, (enemy['x'], enemy['y']))
-                    else:
-                        screen.blit(enemy_img, (enemy['x'], enemy['y']))
-
-                font = pygame.font.SysFont('Arial', 36, bold=True)
-                status_text = font.render(f"Score: {score}  Level: {level}", True, WHITE)
-                status_rect = status_text.get_rect(center=(WIDTH//2, HEIGHT - 20))
-                screen.blit(status_text, status_rect)
-
-                for i in range(lives):
-                    screen.blit(lives_icon, (WIDTH - (LIVES_ICON_WIDTH + 10) * (i + 1), HEIGHT - LIVES_ICON_HEIGHT - 10))
-
-                pygame.display.flip()
-                
-                clock.tick(60)
-
-            except Exception as e:
-                debug_print(f"Error in game loop: {e}")
-                running = False
-
-        if pygame.mixer.get_init():
-            pygame.mixer.music.stop()
-        debug_print("Exiting play_game()...")
-        return score
-    except Exception as e:
-        debug_print(f"Error in play_game(): {e}")
-        input("Press Enter to exit...")
-        sys.exit(1)
-
-# Main game loop with high scores and end credits
-debug_print("Starting main loop...")
-try:
-    high_scores = load_high_scores()
-    while True:
-        show_start_screen(high_scores)
-        final_score = play_game()
-        
-        if not high_scores or final_score > min([entry['score'] for entry in high_scores]) or len(high_scores) < 5:
-            initials = show_enter_initials_screen(final_score)
-            high_scores = update_high_scores(final_score, initials)
-            save_high_scores(high_scores)
-        
-        if not show_game_over_screen(final_score):
-            show_end_credits()  # Show credits before exiting
-            break
-except Exception as e:
-    debug_print(f"Error in main loop: {e}")
-    input("Press Enter to exit...")
-finally:
-    pygame.quit()
-    debug_print(f"Game Over! Final Score: {final_score if 'final_score' in locals() else 'N/A'}")
-    input("Press Enter to exit...")
\ No newline at end of file
+import pygame
+import gc
+import os
+import sys
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from fonts import get_font, render_text
+from assets import AudioLoader, StartupReport, load_sprite
+from atlas import SpriteAtlas
+from audio import SoundManager, configure_mixer
+from capture import FORMATS as CAPTURE_FORMATS, CaptureError, VideoRecorder
+from display import Display, SCALE_MODES
+from entities import MEGA
+from particles import ParticleSystem
+from profiler import FrameProfiler
+from render import FullRenderer, DirtyRectRenderer
+from replay import Recorder, Replay, ReplayError, Replayer, verify
+from scenes import Scene, SceneManager, TimedScene
+from scores import DEFAULT_MODE, ScoreStore
+from snapshot import RewindBuffer, SnapshotError, restore, snapshot
+import spectator
+from game_state import (
+    GameState, Inputs, SIM_RATE, WIDTH, HEIGHT,
+    PLAYER_WIDTH, PLAYER_HEIGHT, ENEMY_WIDTH, ENEMY_HEIGHT,
+    BOMBER_WIDTH, BOMBER_HEIGHT, ELITE_WIDTH, ELITE_HEIGHT,
+    MEGA_WIDTH, MEGA_HEIGHT, BULLET_WIDTH, BULLET_HEIGHT,
+    BOMB_WIDTH, BOMB_HEIGHT, EXPLOSION_WIDTH, EXPLOSION_HEIGHT,
+)
+
+# Debug flag to print more info
+DEBUG = True
+
+def debug_print(message):
+    if DEBUG:
+        print(message)
+
+# Integer command line option such as "--fps 144", or default
+def arg_value(flag, default):
+    if flag in sys.argv:
+        try:
+            return int(sys.argv[sys.argv.index(flag) + 1])
+        except (IndexError, ValueError):
+            debug_print(f"Ignoring bad value for {flag}")
+    return default
+
+# Repaint only the screen regions that changed (pass --dirty-rects)
+DIRTY_RECTS = "--dirty-rects" in sys.argv
+
+# Game logic runs at a fixed SIM_RATE ticks per second; the screen redraws at
+# RENDER_FPS (pass --fps N, 0 = uncapped) with interpolated positions
+RENDER_FPS = arg_value("--fps", 60)
+MAX_FRAME_TIME = 0.25  # longer stalls drop game time instead of fast-forwarding
+
+# Fixed random seed for reproducible runs (pass --seed N)
+SEED = arg_value("--seed", None)
+
+# Every game is recorded; the last one and each high score run are kept here.
+# Pass --replay FILE to watch a recording instead of playing.
+REPLAY_DIR = "replays"
+REPLAY_FILE = sys.argv[sys.argv.index("--replay") + 1] if "--replay" in sys.argv[:-1] else None
+
+# Frame profiler: F3 toggles the overlay (or pass --profile to start with it
+# on), F4 writes the last frames to PROFILE_DIR as CSV and Chrome trace JSON
+PROFILE_OVERLAY = "--profile" in sys.argv
+PROFILE_DIR = "profiles"
+PROFILE_GRAPH_FRAMES = 120
+GREEN = (0, 255, 0)
+
+# Output: the game draws at WIDTH x HEIGHT and is scaled once per frame to
+# the window. --fullscreen uses the desktop resolution, --window-scale N
+# opens an N times larger window, --scale picks sharp whole-number scaling
+# (integer, the default), filtered scaling that fills the screen (smooth) or
+# SDL's GPU scaling (gpu); see display.py
+FULLSCREEN = "--fullscreen" in sys.argv
+WINDOW_SCALE = arg_value("--window-scale", 1)
+SCALE_MODE = sys.argv[sys.argv.index("--scale") + 1] if "--scale" in sys.argv[:-1] else SCALE_MODES[0]
+if SCALE_MODE not in SCALE_MODES:
+    debug_print(f"Ignoring unknown --scale {SCALE_MODE}")
+    SCALE_MODE = SCALE_MODES[0]
+
+# Practice mode (pass --practice): R rewinds REWIND_STEP seconds, up to
+# REWIND_SECONDS back; F5 saves the game to QUICKSAVE_FILE and F9 loads it.
+# Practice games don't go on the high score table or into replays/.
+PRACTICE = "--practice" in sys.argv
+REWIND_SECONDS = 10
+REWIND_STEP = 2
+QUICKSAVE_FILE = "quicksave.aos"
+
+# Live spectator stream (pass --spectate, optionally with an address such as
+# 7420, 127.0.0.1:7420 or unix:/tmp/aether.sock); watch it with
+# python spectator.py ADDRESS. See spectator.py.
+SPECTATE = None
+if "--spectate" in sys.argv:
+    SPECTATE = spectator.DEFAULT_ADDRESS
+    following = sys.argv[sys.argv.index("--spectate") + 1:]
+    if following and not following[0].startswith("--"):
+        SPECTATE = following[0]
+
+# Video capture: F8 starts and stops recording the game (or a replay being
+# watched) into RECORD_DIR; --record starts right away, e.g. with --replay to
+# make an attract loop. --record-format picks a Y4M video (default) or a PNG
+# sequence; see capture.py.
+RECORD_DIR = "recordings"
+RECORD_AT_START = "--record" in sys.argv
+RECORD_FORMAT = sys.argv[sys.argv.index("--record-format") + 1] if "--record-format" in sys.argv[:-1] else CAPTURE_FORMATS[0]
+if RECORD_FORMAT not in CAPTURE_FORMATS:
+    debug_print(f"Ignoring unknown --record-format {RECORD_FORMAT}")
+    RECORD_FORMAT = CAPTURE_FORMATS[0]
+
+# Keep sound effects as mono 22 kHz samples to save memory (pass --compact-audio)
+COMPACT_AUDIO = "--compact-audio" in sys.argv
+
+# Colors
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+YELLOW = (255, 255, 0)
+LIGHT_BLUE = (173, 216, 230)
+
+# Sizes of screen-only images (gameplay sizes come from game_state)
+TITLE_WIDTH, TITLE_HEIGHT = 450, 200
+LIVES_ICON_WIDTH, LIVES_ICON_HEIGHT = 25, 20
+
+# In-game sprites packed into the atlas: name -> (file, size, fallback colour)
+SPRITE_FILES = {
+    'player': ("player.png", (PLAYER_WIDTH, PLAYER_HEIGHT), WHITE),
+    'lives': ("player.png", (LIVES_ICON_WIDTH, LIVES_ICON_HEIGHT), WHITE),
+    'enemy': ("enemy.png", (ENEMY_WIDTH, ENEMY_HEIGHT), RED),
+    'bomber': ("bomber.png", (BOMBER_WIDTH, BOMBER_HEIGHT), YELLOW),
+    'elite': ("elite.png", (ELITE_WIDTH, ELITE_HEIGHT), (0, 255, 0)),
+    'mega': ("mega.png", (MEGA_WIDTH, MEGA_HEIGHT), (255, 0, 255)),
+    'bullet': ("bullet.png", (BULLET_WIDTH, BULLET_HEIGHT), WHITE),
+    'bomb': ("bomb.png", (BOMB_WIDTH, BOMB_HEIGHT), YELLOW),
+    'explosion': ("explosion.png", (EXPLOSION_WIDTH, EXPLOSION_HEIGHT), RED),
+}
+ENEMY_SPRITES = ('enemy', 'bomber', 'elite', 'mega')  # indexed by entity kind code
+
+# Explosion particle effects, both animated from the explosion sprite: a
+# flash that swells and fades, and a burst of shrinking sparks. Sizes are
+# the animation frames in pixels; speeds are px/s and lifetimes seconds.
+FLASH_SIZES = (40, 50, 56, 58, 54, 46)
+FLASH_LIFE = 0.5
+SPARK_SIZES = (10, 8, 7, 6, 4, 3)
+SPARK_LIFE = 0.6
+SPARK_SPEED = 220
+SPARKS_PER_EXPLOSION = 14
+
+SOUND_FILES = {
+    'bullet': "bullet.wav",
+    'explosion': "explosion.wav",
+    'bomb_drop': "bomb_drop.wav",
+    'dive': "dive.wav",
+}
+MUSIC_FILE = "background_music.mp3"
+
+# Game events from GameState.step() that play a sound
+EVENT_SOUNDS = {
+    'shoot': 'bullet',
+    'explosion': 'explosion',
+    'bomb_drop': 'bomb_drop',
+    'dive': 'dive',
+}
+
+# Reserved mixer channels per group, and each sound's (group, max voices)
+CHANNEL_GROUPS = {'player': 2, 'impacts': 4, 'enemies': 3}
+SOUND_VOICES = {
+    'bullet': ('player', 2),
+    'explosion': ('impacts', 3),
+    'bomb_drop': ('enemies', 2),
+    'dive': ('enemies', 1),
+}
+
+# Set up by init_game(); importing this module has no side effects
+display = None
+screen = None  # the logical canvas everything draws on
+background = None
+title_img = None
+atlas = None
+particles = None
+audio = None
+sounds = None
+startup = None
+
+# Initialize Pygame, open the window and load assets
+def init_game():
+    global display, screen, background, title_img, atlas, particles, audio, sounds, startup
+    startup = StartupReport()
+
+    debug_print("Initializing Pygame...")
+    try:
+        configure_mixer(COMPACT_AUDIO)
+        pygame.init()
+        pygame.mixer.init()
+    except Exception as e:
+        debug_print(f"Error initializing Pygame: {e}")
+        input("Press Enter to exit...")
+        sys.exit(1)
+    startup.mark("pygame init")
+
+    # Set up the display
+    debug_print("Setting up display...")
+    try:
+        display = Display((WIDTH, HEIGHT), SCALE_MODE, FULLSCREEN,
+                          (WIDTH * WINDOW_SCALE, HEIGHT * WINDOW_SCALE))
+        screen = display.canvas
+        pygame.display.set_caption("Space Invaders")
+    except Exception as e:
+        debug_print(f"Error setting up display: {e}")
+        input("Press Enter to exit...")
+        sys.exit(1)
+    startup.mark("display")
+
+    # Sounds and music decode on a worker thread while the start screen is up
+    debug_print("Loading sounds and music in the background...")
+    audio = AudioLoader(SOUND_FILES, MUSIC_FILE, log=debug_print).start()
+    sounds = SoundManager(audio.get, CHANNEL_GROUPS, SOUND_VOICES)
+
+    # Load images with explicit fallbacks, pre-scaled through the disk cache
+    debug_print("Loading images...")
+    background = load_sprite("background.png", (WIDTH, HEIGHT), BLACK, alpha=False, log=debug_print)
+    title_img = load_sprite("title.png", (TITLE_WIDTH, TITLE_HEIGHT), WHITE, log=debug_print)
+    atlas = SpriteAtlas({
+        name: load_sprite(filename, size, color, log=debug_print)
+        for name, (filename, size, color) in SPRITE_FILES.items()
+    })
+    explosion = atlas.sprite('explosion')
+    particles = ParticleSystem({
+        'flash': [pygame.transform.smoothscale(explosion, (size, size)) for size in FLASH_SIZES],
+        'spark': [pygame.transform.smoothscale(explosion, (size, size)) for size in SPARK_SIZES],
+    })
+    startup.mark("images")
+
+# High scores live in SQLite (see scores.py); the old JSON table is imported
+# on first run. Seeded games are reproducible, so each seed gets its own table.
+HIGH_SCORE_DB = "high_scores.db"
+HIGH_SCORE_FILE = "high_scores.json"
+SCORE_MODE = f"seed {SEED}" if SEED is not None else DEFAULT_MODE
+
+# Set up by main()
+scores = None
+final_score = None
+publisher = None  # spectator.Publisher with --spectate
+video = None      # capture.VideoRecorder while recording
+
+# Start or stop recording the screen
+def toggle_recording():
+    global video
+    if video:
+        debug_print(f"Recording saved: {video.close()}")
+        video = None
+        return
+    name = f"capture_{time.strftime('%Y%m%d_%H%M%S')}"
+    if RECORD_FORMAT == 'y4m':
+        name += ".y4m"
+    try:
+        os.makedirs(RECORD_DIR, exist_ok=True)
+        video = VideoRecorder(os.path.join(RECORD_DIR, name), screen, RENDER_FPS or 60, RECORD_FORMAT,
+                              log=debug_print)
+        debug_print(f"Recording to {video.path}")
+    except (OSError, CaptureError) as e:
+        debug_print(f"Could not start recording: {e}")
+
+# Title screen with the high score table and a blinking prompt
+class StartScene(Scene):
+    idle = True
+    BLINK = 0.5  # seconds per blink phase
+
+    def enter(self):
+        debug_print("Showing start screen...")
+        self.high_scores = scores.top(SCORE_MODE)
+        self.high_score_title = render_text("High Scores", 25, LIGHT_BLUE)
+        self.start_text = render_text("Press S to Start", 30, YELLOW)
+        self.start_rect = self.start_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 200))
+        self.blink_on = True
+        self.blink_elapsed = 0.0
+        self.dirty = True
+
+    def handle(self, event):
+        super().handle(event)
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_s:
+            debug_print("S pressed, exiting start screen...")
+            self.manager.replace(PlayScene())
+
+    def update(self, dt):
+        self.blink_elapsed += dt
+        if self.blink_elapsed >= self.BLINK:
+            self.blink_elapsed %= self.BLINK
+            self.blink_on = not self.blink_on
+            self.dirty = True
+
+    def wake_ms(self):
+        return max(1, int((self.BLINK - self.blink_elapsed) * 1000))
+
+    def draw(self):
+        screen.blit(background, (0, 0))
+        screen.blit(title_img, (WIDTH//2 - TITLE_WIDTH//2, HEIGHT//2 - 250))
+        screen.blit(self.high_score_title, (WIDTH//2 - self.high_score_title.get_width()//2, HEIGHT//2 - 20))
+        for i, entry in enumerate(self.high_scores[:5]):
+            score_text = render_text(f"{entry['initials']} - {entry['score']}", 25, LIGHT_BLUE)
+            screen.blit(score_text, (WIDTH//2 - score_text.get_width()//2, HEIGHT//2 + 10 + i * 30))
+        if self.blink_on:
+            screen.blit(self.start_text, self.start_rect)
+        display.flip()
+        if not startup.reported:
+            startup.mark("first frame")
+            startup.report(debug_print)
+
+# Gameplay: the simulation advances in fixed ticks however long a frame
+# takes, and each frame draws between the last two ticks. Pausing and level
+# transitions push their own scenes on top instead of blocking the loop.
+class PlayScene(Scene):
+    def __init__(self):
+        super().__init__()
+        # All game rules live in GameState, this scene only reads input and draws
+        debug_print("Setting game state...")
+        self.state = GameState(SEED, SIM_RATE)
+        self.recorder = Recorder(self.state)
+        self.profiler = FrameProfiler()
+        self.state.profiler = self.profiler
+        self.show_profiler = PROFILE_OVERLAY
+        self.profiler_panel = pygame.Surface((260, 230), pygame.SRCALPHA)
+        debug_print(f"Game seed: {self.state.seed}")
+        if DIRTY_RECTS:
+            self.renderer = DirtyRectRenderer(display, background)
+        else:
+            self.renderer = FullRenderer(display, background)
+        self.tick_time = 1.0 / SIM_RATE
+        self.accumulator = 0.0
+        self.frame_time = 0.0
+        # Key presses are held until a tick consumes them
+        self.fire = self.pause_pressed = self.toggle_bombs = False
+        self.explosion_uid = 0
+        self.rewind = RewindBuffer(REWIND_SECONDS * SIM_RATE, SIM_RATE // 2) if PRACTICE else None
+
+    def enter(self):
+        debug_print("Starting background music...")
+        if pygame.mixer.get_init():
+            audio.play_music()
+        else:
+            debug_print("Mixer not initialized, skipping music...")
+        particles.clear()
+        debug_print("Entering game loop...")
+
+    # Back from the pause or level transition: don't fast-forward through
+    # the time it was up
+    def resume(self):
+        self.accumulator = 0.0
+        self.renderer.invalidate()
+        self.profiler.skip()
+
+    def begin_frame(self):
+        self.profiler.begin_frame()
+
+    def handle(self, event):
+        if event.type == pygame.QUIT:
+            self.end()
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                self.fire = True
+            if event.key == pygame.K_p:
+                self.pause_pressed = True
+            if event.key == pygame.K_b:
+                self.toggle_bombs = True
+            if event.key == pygame.K_F3:
+                self.show_profiler = not self.show_profiler
+                self.renderer.invalidate()
+            if event.key == pygame.K_F4:
+                export_profile(self.profiler)
+            if event.key == pygame.K_F8:
+                toggle_recording()
+            if self.rewind is not None:
+                if event.key == pygame.K_r and len(self.rewind):
+                    self.load(self.rewind.rewind(REWIND_STEP * SIM_RATE))
+                if event.key == pygame.K_F5:
+                    self.quicksave()
+                if event.key == pygame.K_F9:
+                    self.quickload()
+
+    def update(self, dt):
+        try:
+            self.frame_time = min(dt, MAX_FRAME_TIME)
+            self.accumulator = min(self.accumulator + self.frame_time, MAX_FRAME_TIME)
+            keys = pygame.key.get_pressed()
+            self.profiler.lap('events')
+            # Stop ticking as soon as another scene takes over
+            while self.manager.top is self and self.accumulator >= self.tick_time:
+                self.accumulator -= self.tick_time
+                inputs = Inputs(left=keys[pygame.K_LEFT], right=keys[pygame.K_RIGHT],
+                                fire=self.fire, pause=self.pause_pressed, toggle_bombs=self.toggle_bombs)
+                self.fire = self.pause_pressed = self.toggle_bombs = False
+                for game_event in self.recorder.step(inputs):
+                    self.game_event(game_event)
+                sounds.flush()
+                if publisher:
+                    publisher.tick(self.state)
+                if self.rewind is not None and not self.state.paused:
+                    self.rewind.push(self.state)
+        except Exception as e:
+            debug_print(f"Error in game loop: {e}")
+            self.end()
+
+    def game_event(self, game_event):
+        state = self.state
+        if game_event in EVENT_SOUNDS:
+            sounds.play(EVENT_SOUNDS[game_event])
+        elif game_event == 'pause':
+            if pygame.mixer.get_init():
+                pygame.mixer.music.pause()
+            self.manager.push(PauseScene(self))
+        elif game_event == 'unpause':
+            if pygame.mixer.get_init():
+                pygame.mixer.music.unpause()
+            self.renderer.invalidate()
+        elif game_event == 'bombs_toggled':
+            debug_print(f"Bombs {'enabled' if state.bombs_enabled else 'disabled'}")
+        elif game_event == 'level_up':
+            self.manager.push(LevelTransitionScene(state.level, self.level_jobs()))
+        elif game_event == 'game_over':
+            self.end()
+
+    # Practice mode: continue from a snapshot
+    def load(self, data):
+        restore(self.state, data)
+        # Explosions already on screen don't burst again
+        self.explosion_uid = self.state.next_uid - 1
+        particles.clear()
+        self.renderer.invalidate()
+
+    def quicksave(self):
+        try:
+            with open(QUICKSAVE_FILE, 'wb') as f:
+                f.write(snapshot(self.state))
+            debug_print(f"Game saved to {QUICKSAVE_FILE}")
+        except (OSError, SnapshotError) as e:
+            debug_print(f"Could not save game: {e}")
+
+    def quickload(self):
+        try:
+            with open(QUICKSAVE_FILE, 'rb') as f:
+                self.load(f.read())
+            self.rewind.clear()
+            debug_print(f"Game loaded from {QUICKSAVE_FILE}")
+        except (OSError, SnapshotError) as e:
+            debug_print(f"Could not load game: {e}")
+
+    # Work for the level transition to do while its banner is up, one job
+    # per frame. GameState has already laid out the new formation and the
+    # renderer repaints everything on resume(), so what is left is the new
+    # HUD line and a collection now, rather than mid-level.
+    def level_jobs(self):
+        state = self.state
+        return [
+            lambda: render_text(f"Score: {state.score}  Level: {state.level}", 36, WHITE),
+            gc.collect,
+        ]
+
+    def draw(self):
+        # The pause screen stays up until the unpause tick runs
+        if self.state.paused or self.manager.top is not self:
+            return
+        try:
+            particles.update(self.frame_time)
+            self.explosion_uid = spawn_explosion_effects(self.state, self.explosion_uid)
+            renderer = self.renderer
+            renderer.begin()
+            draw_game(self.state, renderer, self.accumulator / self.tick_time, particles)
+            if self.show_profiler:
+                draw_profiler_overlay(self.profiler, renderer, self.profiler_panel)
+            self.profiler.lap('render')
+            renderer.present()
+            if video:
+                video.capture(screen)
+            self.profiler.lap('flip')
+            self.profiler.end_frame()
+        except Exception as e:
+            debug_print(f"Error in game loop: {e}")
+            self.end()
+
+    # Game over (or the window was closed): keep the replay and move on to
+    # the high score check
+    def end(self):
+        global final_score
+        if self.manager.top is not self:
+            return
+        if pygame.mixer.get_init():
+            audio.stop_music()
+        debug_print("Exiting game...")
+        state = self.state
+        replay = self.recorder.replay
+        if self.rewind is None:
+            save_replay(replay, "last.aorp")
+        for name, stats in state.pool_stats().items():
+            debug_print(f"Pool {name}: high water {stats['high_water']} of {stats['capacity']} slots, grew {stats['grows']}x")
+        if isinstance(self.renderer, DirtyRectRenderer):
+            renderer = self.renderer
+            frames = renderer.full_flips + renderer.partial_updates
+            debug_print(f"Dirty rects: {renderer.full_flips} of {frames} frames fell back to a full flip")
+        stats = sounds.stats()
+        debug_print(f"Sounds: {stats['played']} played, {stats['coalesced']} merged with the same tick, "
+                    f"{stats['limited']} over the voice limit")
+        final_score = state.score
+        if self.rewind is None and scores.qualifies(state.score, SCORE_MODE):
+            self.manager.replace(VerifyScene(state.score, replay))
+        else:
+            self.manager.replace(GameOverScene(state.score))
+
+# Dims the last game frame until P is pressed again
+class PauseScene(Scene):
+    idle = True
+
+    def __init__(self, play):
+        super().__init__()
+        self.play = play
+
+    def enter(self):
+        debug_print("Showing pause screen...")
+        overlay = pygame.Surface((WIDTH, HEIGHT))
+        overlay.set_alpha(128)
+        overlay.fill(BLACK)
+        screen.blit(overlay, (0, 0))
+        pause_text = render_text("PAUSED", 48, WHITE)
+        instruction_text = render_text("Press P to continue", 48, WHITE)
+        screen.blit(pause_text, (WIDTH//2 - pause_text.get_width()//2, HEIGHT//2 - 50))
+        screen.blit(instruction_text, (WIDTH//2 - instruction_text.get_width()//2, HEIGHT//2 + 20))
+
+    def handle(self, event):
+        if event.type == pygame.QUIT:
+            self.manager.pop()
+            self.play.end()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+            # The unpause goes through the next tick's inputs so the replay records it
+            self.manager.pop()
+            self.play.pause_pressed = True
+
+    def draw(self):
+        display.flip()
+
+# "Level N" banner for two seconds while the next level gets ready. The jobs
+# run one per frame so events keep flowing; the game resumes when both the
+# time and the jobs are done.
+class LevelTransitionScene(TimedScene):
+    def __init__(self, level, jobs=()):
+        super().__init__(2.0)
+        self.level = level
+        self.jobs = list(jobs)
+
+    def enter(self):
+        debug_print(f"Showing level transition for level {self.level}...")
+
+    # Closing the window skips the banner and ends the game
+    def handle(self, event):
+        if event.type == pygame.QUIT:
+            self.jobs.clear()
+            self.manager.pop()
+            self.manager.top.handle(event)
+
+    def update(self, dt):
+        if self.jobs:
+            self.jobs.pop(0)()
+        super().update(dt)
+
+    def wake_ms(self):
+        return 0 if self.jobs else super().wake_ms()
+
+    def finish(self):
+        if not self.jobs:
+            self.manager.pop()
+
+    def draw(self):
+        screen.blit(background, (0, 0))
+        level_text = render_text(f"Level {self.level}", 48, WHITE)
+        screen.blit(level_text, (WIDTH//2 - level_text.get_width()//2, HEIGHT//2 - 24))
+        display.flip()
+
+# Replays a qualifying run on a worker thread before it may enter the table;
+# only runs that replay to the same score are recorded
+class VerifyScene(Scene):
+    idle = True
+    POLL_MS = 50
+
+    def __init__(self, score, replay):
+        super().__init__()
+        self.score = score
+        self.replay = replay
+
+    def enter(self):
+        debug_print("Verifying high score replay...")
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.result = self.executor.submit(verify, self.replay)
+
+    def exit(self):
+        self.executor.shutdown(wait=False)
+
+    # Closing the window gives up on the check; the worker is left to finish
+    # on its own (exit() shuts the executor down without waiting)
+    def handle(self, event):
+        if event.type == pygame.QUIT:
+            self.manager.replace(CreditsScene())
+
+    def update(self, dt):
+        if not self.result.done():
+            return
+        try:
+            verified = self.result.result()
+        except Exception as e:
+            debug_print(f"Error verifying replay: {e}")
+            verified = False
+        if verified:
+            self.manager.replace(InitialsScene(self.score, self.replay))
+        else:
+            debug_print("Replay did not reproduce the score, not recording high score")
+            self.manager.replace(GameOverScene(self.score))
+
+    def wake_ms(self):
+        return self.POLL_MS
+
+    def draw(self):
+        screen.blit(background, (0, 0))
+        checking_text = render_text("Checking score...", 36, WHITE)
+        screen.blit(checking_text, (WIDTH//2 - checking_text.get_width()//2, HEIGHT//2 - 18))
+        display.flip()
+
+# Enter initials for a new high score
+class InitialsScene(Scene):
+    idle = True
+
+    def __init__(self, score, replay):
+        super().__init__()
+        self.score = score
+        self.replay = replay
+        self.initials = ""
+
+    def enter(self):
+        debug_print("Showing enter initials screen...")
+        self.prompt_text = render_text(f"New High Score: {self.score}", 48, WHITE)
+        self.instruction_text = render_text("Enter 3 initials:", 48, WHITE)
+
+    def handle(self, event):
+        super().handle(event)
+        if event.type != pygame.KEYDOWN:
+            return
+        if event.key == pygame.K_RETURN and len(self.initials) == 3:
+            self.submit()
+        elif event.key == pygame.K_BACKSPACE and self.initials:
+            self.initials = self.initials[:-1]
+            self.dirty = True
+        elif len(self.initials) < 3 and event.key >= pygame.K_a and event.key <= pygame.K_z:
+            self.initials += chr(event.key).upper()
+            self.dirty = True
+
+    def submit(self):
+        replay = self.replay
+        replay_name = f"{self.initials}_{self.score}_{int(time.time())}.aorp"
+        scores.submit(self.initials, self.score, SCORE_MODE, level=replay.level, seed=replay.seed,
+                      replay=replay_name)
+        save_replay(replay, replay_name)
+        self.manager.replace(GameOverScene(self.score))
+
+    def draw(self):
+        screen.blit(background, (0, 0))
+        screen.blit(self.prompt_text, (WIDTH//2 - self.prompt_text.get_width()//2, HEIGHT//2 - 50))
+        screen.blit(self.instruction_text, (WIDTH//2 - self.instruction_text.get_width()//2, HEIGHT//2 + 20))
+        initials_text = render_text(self.initials, 48, WHITE)
+        screen.blit(initials_text, (WIDTH//2 - initials_text.get_width()//2, HEIGHT//2 + 80))
+        display.flip()
+
+# Game over screen with play again option
+class GameOverScene(Scene):
+    idle = True
+
+    def __init__(self, score):
+        super().__init__()
+        self.score = score
+
+    def enter(self):
+        debug_print("Showing game over screen...")
+
+    def handle(self, event):
+        if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_n):
+            self.manager.replace(CreditsScene())
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_y:
+            self.manager.replace(StartScene())
+
+    def draw(self):
+        game_over_text = render_text("GAME OVER", 48, WHITE)
+        score_text = render_text(f"Final Score: {self.score}", 48, WHITE)
+        play_again_text = render_text("Play Again? (Y/N)", 48, WHITE)
+        screen.blit(background, (0, 0))
+        screen.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, HEIGHT//2 - 100))
+        screen.blit(score_text, (WIDTH//2 - score_text.get_width()//2, HEIGHT//2 - 30))
+        screen.blit(play_again_text, (WIDTH//2 - play_again_text.get_width()//2, HEIGHT//2 + 40))
+        display.flip()
+
+# End credits, shown for 5 seconds before exiting
+class CreditsScene(TimedScene):
+    def __init__(self):
+        super().__init__(5.0)
+
+    def enter(self):
+        debug_print("Showing end credits screen...")
+
+    def finish(self):
+        self.manager.quit()
+
+    def draw(self):
+        screen.blit(background, (0, 0))
+
+        credits_line1 = render_text("Programming and graphics by", 36, WHITE)
+        credits_line2 = render_text("Brian Zimmerman using Grok", 36, WHITE)
+        credits_line3 = render_text("Music arranged by", 36, WHITE)
+        credits_line4 = render_text("Brian Zimmerman 2025", 36, WHITE)
+
+        screen.blit(credits_line1, (WIDTH//2 - credits_line1.get_width()//2, HEIGHT//2 - 100))
+        screen.blit(credits_line2, (WIDTH//2 - credits_line2.get_width()//2, HEIGHT//2 - 50))
+        screen.blit(credits_line3, (WIDTH//2 - credits_line3.get_width()//2, HEIGHT//2 + 20))
+        screen.blit(credits_line4, (WIDTH//2 - credits_line4.get_width()//2, HEIGHT//2 + 60))
+
+        display.flip()
+
+# Plays a recorded game back on screen in real time (Escape to stop)
+class ReplayScene(Scene):
+    def __init__(self, replay):
+        super().__init__()
+        self.replayer = Replayer(replay)
+        self.renderer = FullRenderer(display, background)
+        self.tick_time = 1.0 / replay.tick_rate
+        self.accumulator = 0.0
+        self.frame_time = 0.0
+        self.explosion_uid = 0
+
+    def enter(self):
+        particles.clear()
+
+    def handle(self, event):
+        if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+            self.manager.quit()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F8:
+            toggle_recording()
+
+    def update(self, dt):
+        replayer = self.replayer
+        self.frame_time = min(dt, MAX_FRAME_TIME)
+        self.accumulator = min(self.accumulator + self.frame_time, MAX_FRAME_TIME)
+        try:
+            while self.accumulator >= self.tick_time and not replayer.done():
+                self.accumulator -= self.tick_time
+                for game_event in replayer.step():
+                    if game_event in EVENT_SOUNDS:
+                        sounds.play(EVENT_SOUNDS[game_event])
+                sounds.flush()
+                if publisher:
+                    publisher.tick(replayer.state)
+        except ReplayError as e:
+            debug_print(str(e))
+            self.manager.quit()
+            return
+        if replayer.done():
+            debug_print(f"Replay finished: score {replayer.state.score}, level {replayer.state.level}")
+            self.manager.quit()
+
+    def draw(self):
+        particles.update(self.frame_time)
+        self.explosion_uid = spawn_explosion_effects(self.replayer.state, self.explosion_uid)
+        self.renderer.begin()
+        draw_game(self.replayer.state, self.renderer, self.accumulator / self.tick_time, particles)
+        self.renderer.present()
+        if video:
+            video.capture(screen)
+
+# Frame-time graph (green within budget, red over) and per-phase averages
+def draw_profiler_overlay(profiler, renderer, panel):
+    panel.fill((0, 0, 0, 170))
+    budget = 1000 / (RENDER_FPS or 60)
+    graph_height = 50
+    base = graph_height + 5
+    for i, ms in enumerate(profiler.frame_times_ms(PROFILE_GRAPH_FRAMES).tolist()):
+        height = min(graph_height, int(ms / (2 * budget) * graph_height))
+        pygame.draw.line(panel, GREEN if ms <= budget else RED, (5 + i * 2, base), (5 + i * 2, base - height))
+    pygame.draw.line(panel, YELLOW, (5, base - graph_height // 2), (panel.get_width() - 5, base - graph_height // 2))
+    y = base + 5
+    # Rendered directly: these change every frame and would only push the
+    # screen and HUD text out of the render_text cache
+    font = get_font(14)
+    for phase, ms in profiler.phase_means_ms().items():
+        panel.blit(font.render(f"{phase}: {ms:.2f} ms", True, WHITE), (5, y))
+        y += 16
+    renderer.blit(panel, (10, 10))
+
+# Write the profiler's ring buffer as CSV and Chrome trace JSON
+def export_profile(profiler):
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"profile_{stamp}")
+        profiler.export_csv(base + ".csv")
+        profiler.export_chrome_trace(base + ".trace.json")
+        debug_print(f"Profile written to {base}.csv and {base}.trace.json")
+    except OSError as e:
+        debug_print(f"Could not write profile: {e}")
+
+# Write a replay into REPLAY_DIR on the score writer thread, so the game
+# never waits on the disk; disk errors are only logged
+def save_replay(replay, filename):
+    def write():
+        try:
+            os.makedirs(REPLAY_DIR, exist_ok=True)
+            replay.save(os.path.join(REPLAY_DIR, filename))
+        except OSError as e:
+            debug_print(f"Could not save replay {filename}: {e}")
+    scores.defer(write)
+
+# Start particle bursts for explosions that appeared since the last call.
+# Returns the newest explosion uid seen, to pass back in next time.
+def spawn_explosion_effects(state, last_uid):
+    explosions = state.explosions
+    n = explosions.count
+    new = np.flatnonzero(explosions.uid[:n] > last_uid)
+    for i in new.tolist():
+        x = float(explosions.x[i]) + EXPLOSION_WIDTH / 2
+        y = float(explosions.y[i]) + EXPLOSION_HEIGHT / 2
+        particles.burst('flash', x, y, life=FLASH_LIFE)
+        particles.burst('spark', x, y, SPARKS_PER_EXPLOSION, SPARK_SPEED, SPARK_LIFE)
+    if len(new):
+        last_uid = int(explosions.uid[new].max())
+    return last_uid
+
+# Draw one frame of a GameState through a renderer (see render.py),
+# one batched blit per sprite layer. alpha blends from the previous tick's
+# positions (0) to the current ones (1). Explosions are drawn as particles
+# when a ParticleSystem is given, else as the plain explosion sprite.
+def draw_game(state, renderer, alpha=1.0, particles=None):
+    if particles is None:
+        renderer.blits(atlas.layer('explosion', state.explosions.positions(alpha)))
+
+    if not state.player_explosion:
+        player_x = state.prev_player_x + (state.player_x - state.prev_player_x) * alpha
+        renderer.blit(atlas.surface, (player_x, state.player_y), atlas.rects['player'])
+    else:
+        renderer.blit(atlas.surface, (state.player_explosion['x'], state.player_explosion['y']),
+                      atlas.rects['explosion'])
+
+    renderer.blits(atlas.layer('bullet', state.bullets.positions(alpha)))
+    renderer.blits(atlas.layer('bomb', state.bombs.positions(alpha)))
+
+    # Enemies still in formation first, dirtied as one block; divers and the
+    # mega alien each on their own
+    enemies = state.enemies
+    n = enemies.count
+    kind = enemies.kind[:n]
+    loose = enemies.diving[:n] | (kind == MEGA)
+    order = np.argsort(loose, kind='stable').tolist()
+    positions = list(enemies.positions(alpha))
+    in_formation = n - int(np.count_nonzero(loose))
+    renderer.blits(atlas.mixed_layer(ENEMY_SPRITES, kind[order].tolist(), [positions[i] for i in order]),
+                   [in_formation] + [1] * (n - in_formation))
+    if particles is not None:
+        renderer.blits(particles.layer(), particles.group_sizes())
+
+    status_text = render_text(f"Score: {state.score}  Level: {state.level}", 36, WHITE)
+    status_rect = status_text.get_rect(center=(WIDTH//2, HEIGHT - 20))
+    renderer.blit(status_text, status_rect)
+
+    renderer.blits(atlas.layer('lives', [
+        (WIDTH - (LIVES_ICON_WIDTH + 10) * (i + 1), HEIGHT - LIVES_ICON_HEIGHT - 10)
+        for i in range(state.lives)
+    ]), [state.lives])
+
+# One scene manager drives every screen, from the title to the credits
+def main():
+    global scores, publisher
+    init_game()
+    manager = SceneManager(RENDER_FPS)
+    if RECORD_AT_START:
+        toggle_recording()
+    if SPECTATE:
+        try:
+            publisher = spectator.Publisher(SPECTATE, SIM_RATE, log=debug_print)
+            manager.add_poller(publisher.poll)
+            debug_print(f"Spectators can watch at {SPECTATE}")
+        except (OSError, spectator.StreamError) as e:
+            debug_print(f"Could not start spectator stream on {SPECTATE}: {e}")
+    if REPLAY_FILE:
+        debug_print(f"Watching replay {REPLAY_FILE}...")
+        try:
+            manager.push(ReplayScene(Replay.load(REPLAY_FILE)))
+            manager.run()
+        except (OSError, ReplayError) as e:
+            debug_print(f"Could not load replay {REPLAY_FILE}: {e}")
+        if publisher:
+            publisher.close()
+        if video:
+            toggle_recording()
+        pygame.quit()
+        return
+    debug_print("Starting main loop...")
+    scores = ScoreStore(HIGH_SCORE_DB, HIGH_SCORE_FILE, log=debug_print)
+    try:
+        manager.push(StartScene())
+        manager.run()
+    except Exception as e:
+        debug_print(f"Error in main loop: {e}")
+        input("Press Enter to exit...")
+    finally:
+        scores.close()
+        if publisher:
+            publisher.close()
+        if video:
+            toggle_recording()
+        pygame.quit()
+        debug_print(f"Game Over! Final Score: {final_score if final_score is not None else 'N/A'}")
+        input("Press Enter to exit...")
+
+if __name__ == "__main__":
+    main()
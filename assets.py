@@ -0,0 +1,176 @@
+import os
+import struct
+import threading
+import time
+
+import pygame
+
+# Asset loading for the game front end.
+# Scaled sprites are cached on disk as raw RGBA next to the game so later
+# starts skip PNG decoding and rescaling; a cache entry is rebuilt when its
+# source file's mtime or size changes. Sounds and music load on a background
+# thread so the start screen can show while audio is still decoding.
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(ASSET_DIR, ".asset_cache")
+CACHE_MAGIC = b"AOC1"
+CACHE_HEADER = struct.Struct("<4sqqHH")  # magic, source mtime_ns, source size, width, height
+
+
+# Resolve an asset name case-insensitively (background.PNG vs background.png)
+def find_asset(filename):
+    path = os.path.join(ASSET_DIR, filename)
+    if os.path.exists(path):
+        return path
+    lower = filename.lower()
+    for entry in os.listdir(ASSET_DIR):
+        if entry.lower() == lower:
+            return os.path.join(ASSET_DIR, entry)
+    return None
+
+
+def _cache_path(filename, size):
+    stem = os.path.splitext(filename)[0].lower()
+    return os.path.join(CACHE_DIR, f"{stem}_{size[0]}x{size[1]}.rgba")
+
+
+def _read_cache(cache_path, source_stat, size):
+    try:
+        with open(cache_path, 'rb') as f:
+            magic, mtime_ns, source_size, w, h = CACHE_HEADER.unpack(f.read(CACHE_HEADER.size))
+            if (magic != CACHE_MAGIC or mtime_ns != source_stat.st_mtime_ns or
+                    source_size != source_stat.st_size or (w, h) != tuple(size)):
+                return None
+            return pygame.image.frombytes(f.read(), (w, h), 'RGBA')
+    except (OSError, struct.error, ValueError):
+        return None
+
+
+def _write_cache(cache_path, source_stat, surface):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, source_stat.st_mtime_ns, source_stat.st_size,
+                                      *surface.get_size()))
+            f.write(pygame.image.tobytes(surface, 'RGBA'))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+# Load an image scaled to size in display format, going through the disk
+# cache. Missing or broken files give a solid fallback_color rectangle.
+def load_sprite(filename, size, fallback_color, alpha=True, log=print):
+    path = find_asset(filename)
+    try:
+        if path is None:
+            raise FileNotFoundError(filename)
+        source_stat = os.stat(path)
+        cache_path = _cache_path(filename, size)
+        surface = _read_cache(cache_path, source_stat, size)
+        if surface is None:
+            surface = pygame.transform.scale(pygame.image.load(path), size)
+            _write_cache(cache_path, source_stat, surface.convert_alpha())
+        return surface.convert_alpha() if alpha else surface.convert()
+    except Exception as e:
+        log(f"Failed to load {filename}: {e}")
+        surface = pygame.Surface(size)
+        surface.fill(fallback_color)
+        return surface
+
+
+# Loads sounds and background music on a worker thread. get() returns None
+# until a sound is ready, so callers simply stay silent while loading.
+class AudioLoader:
+    def __init__(self, sound_files, music_file=None, music_volume=0.75, log=print):
+        self.sound_files = sound_files
+        self.music_file = music_file
+        self.music_volume = music_volume
+        self.log = log
+        self.sounds = {}
+        self.music_loaded = False
+        self.music_wanted = False
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="audio-loader", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _run(self):
+        if pygame.mixer.get_init():
+            for name, filename in self.sound_files.items():
+                path = find_asset(filename)
+                try:
+                    self.sounds[name] = pygame.mixer.Sound(path or filename)
+                except Exception as e:
+                    self.log(f"Failed to load {filename}: {e}")
+            if self.music_file:
+                try:
+                    path = find_asset(self.music_file)
+                    pygame.mixer.music.load(path or self.music_file)
+                    pygame.mixer.music.set_volume(self.music_volume)
+                    with self.lock:
+                        self.music_loaded = True
+                        if self.music_wanted:
+                            pygame.mixer.music.play(-1)
+                except Exception as e:
+                    self.log(f"Failed to load {self.music_file}: {e}")
+        self.done.set()
+
+    def get(self, name):
+        return self.sounds.get(name)
+
+    # Start looping the music now, or as soon as it has loaded
+    def play_music(self):
+        with self.lock:
+            self.music_wanted = True
+            if self.music_loaded:
+                pygame.mixer.music.play(-1)
+
+    def stop_music(self):
+        with self.lock:
+            self.music_wanted = False
+            if self.music_loaded:
+                pygame.mixer.music.stop()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+# perf_counter() value of when this process started. Linux exposes the start
+# time in /proc; elsewhere fall back to "now", i.e. when this is first called.
+def process_start_time():
+    now = time.perf_counter()
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        age = uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+        return now - max(age, 0.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return now
+
+
+# Wall-clock marks from process start to the first presented frame
+class StartupReport:
+    def __init__(self, start=None):
+        self.start = start if start is not None else process_start_time()
+        self.marks = []
+        self.reported = False
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter()))
+
+    def report(self, log=print):
+        if self.reported:
+            return
+        self.reported = True
+        previous = self.start
+        log("Startup timing:")
+        for label, t in self.marks:
+            log(f"  {label:<24} {(t - previous) * 1000:8.1f} ms  (total {(t - self.start) * 1000:8.1f} ms)")
+            previous = t
@@ -0,0 +1,50 @@
+import pygame
+
+# Sprite atlas: all game sprites packed into one surface with named sub-rects.
+# Layers are drawn with a single Surface.blits() call per layer instead of one
+# Python-level blit per entity, and the atlas is the only copy of the pixels
+# (sprite() hands out subsurfaces that share its memory).
+
+
+class SpriteAtlas:
+    def __init__(self, sprites, padding=1, max_width=1024):
+        # Shelf packing, tallest sprites first
+        self.rects = {}
+        x = y = shelf_height = 0
+        for name, surface in sorted(sprites.items(), key=lambda item: item[1].get_height(), reverse=True):
+            w, h = surface.get_size()
+            if x and x + w > max_width:
+                x = 0
+                y += shelf_height + padding
+                shelf_height = 0
+            self.rects[name] = pygame.Rect(x, y, w, h)
+            x += w + padding
+            shelf_height = max(shelf_height, h)
+
+        width = max(rect.right for rect in self.rects.values())
+        height = max(rect.bottom for rect in self.rects.values())
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        if pygame.display.get_surface():
+            self.surface = self.surface.convert_alpha()
+        self.surface.fill((0, 0, 0, 0))
+        for name, surface in sprites.items():
+            if not surface.get_flags() & pygame.SRCALPHA:
+                surface = surface.convert_alpha() if pygame.display.get_surface() else surface
+            # Add onto the cleared atlas so the sprite's alpha is copied as-is
+            self.surface.blit(surface, self.rects[name], special_flags=pygame.BLEND_RGBA_ADD)
+
+    # One sprite as a standalone surface sharing the atlas pixels
+    def sprite(self, name):
+        return self.surface.subsurface(self.rects[name])
+
+    # Blit sequence drawing one sprite at every position
+    def layer(self, name, positions):
+        surface = self.surface
+        area = self.rects[name]
+        return [(surface, pos, area) for pos in positions]
+
+    # Blit sequence for mixed sprites: codes index into names
+    def mixed_layer(self, names, codes, positions):
+        surface = self.surface
+        areas = [self.rects[name] for name in names]
+        return [(surface, pos, areas[code]) for code, pos in zip(codes, positions)]
@@ -0,0 +1,85 @@
+import pygame
+
+# Sound effect voice manager.
+# Effects play on reserved mixer channel groups instead of whatever channel
+# Sound.play() grabs, each sound has a cap on simultaneous voices, and
+# requests for the same sound within one tick collapse into a single voice.
+# Anything over budget is dropped, so a screen full of bombers costs the
+# mixer no more than a handful of voices.
+
+# Mixer format for compact sample storage: every Sound is converted to the
+# mixer format on load, so mono 22 kHz keeps decoded WAVs at a quarter of
+# the stereo 44.1 kHz size
+COMPACT_FREQUENCY = 22050
+COMPACT_CHANNELS = 1
+
+# Unreserved channels left over for anything that calls Sound.play() directly
+FREE_CHANNELS = 2
+
+
+# Must run before pygame.init()/pygame.mixer.init() to take effect
+def configure_mixer(compact=False):
+    if compact:
+        pygame.mixer.pre_init(frequency=COMPACT_FREQUENCY, size=-16, channels=COMPACT_CHANNELS)
+
+
+class SoundManager:
+    # get_sound(name) returns a loaded Sound or None, groups maps a channel
+    # group to how many channels it reserves, voices maps a sound name to
+    # (group, max simultaneous voices)
+    def __init__(self, get_sound, groups, voices):
+        self.get_sound = get_sound
+        self.voices = voices
+        self.channels = {}
+        self.pending = []
+        self.played = 0
+        self.coalesced = 0
+        self.limited = 0
+        if pygame.mixer.get_init():
+            reserved = sum(groups.values())
+            pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), reserved + FREE_CHANNELS))
+            pygame.mixer.set_reserved(reserved)
+            first = 0
+            for group, count in groups.items():
+                self.channels[group] = [pygame.mixer.Channel(first + i) for i in range(count)]
+                first += count
+
+    # Queue a sound for this tick; duplicates within the tick are merged
+    def play(self, name):
+        if name in self.pending:
+            self.coalesced += 1
+            return
+        self.pending.append(name)
+
+    # Start the queued sounds. Call once per tick after handling its game
+    # events, so only duplicates from the same tick are merged.
+    def flush(self):
+        for name in self.pending:
+            self._start(name)
+        self.pending.clear()
+
+    def _start(self, name):
+        sound = self.get_sound(name)
+        if sound is None:
+            return
+        if name not in self.voices:
+            sound.play()
+            self.played += 1
+            return
+        group, max_voices = self.voices[name]
+        free = None
+        active = 0
+        for channel in self.channels.get(group, ()):
+            if channel.get_busy():
+                if channel.get_sound() is sound:
+                    active += 1
+            elif free is None:
+                free = channel
+        if free is None or active >= max_voices:
+            self.limited += 1
+            return
+        free.play(sound)
+        self.played += 1
+
+    def stats(self):
+        return {'played': self.played, 'coalesced': self.coalesced, 'limited': self.limited}
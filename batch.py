@@ -0,0 +1,145 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from game_state import BASE_TICK_RATE, NO_INPUT, TUNING, GameState, Inputs, autopilot
+
+# Batch runner for difficulty tuning sweeps.
+# Plays many headless games for every combination of the --set values,
+# spread over worker processes, and writes one row per game plus
+# per-configuration aggregates (survival per level, score percentiles,
+# game length, run time) as columns of a NumPy .npz file. The same seeds are
+# used for every configuration, so configurations are compared on the same
+# games.
+#
+#   python batch.py --games 500 --set bomb_drop_chance=0.0025,0.004 --set speed_increase=0.1,0.2
+#   python -c "import numpy as np; r = np.load('sweep.npz'); print(r['survival'])"
+
+
+# Holds a random direction for a random number of ticks and fires at random
+def random_policy(seed):
+    rng = np.random.default_rng(seed)
+    held = [NO_INPUT, 0]
+
+    def policy(state):
+        if held[1] <= 0:
+            move = rng.integers(3)
+            held[0] = Inputs(left=move == 1, right=move == 2)
+            held[1] = int(rng.integers(5, 60))
+        held[1] -= 1
+        if rng.random() < 0.1:
+            return held[0]._replace(fire=True)
+        return held[0]
+    return policy
+
+
+POLICIES = {
+    'autopilot': lambda seed: autopilot,
+    'random': random_policy,
+}
+
+
+# Play one game in a worker. Returns (config, seed, score, level, ticks,
+# finished, seconds).
+def play_one(task):
+    config, tuning, seed, policy_name, max_ticks, tick_rate = task
+    start = time.perf_counter()
+    state = GameState(seed, tick_rate, tuning)
+    policy = POLICIES[policy_name](seed)
+    while not state.game_over and state.tick < max_ticks:
+        state.step(policy(state))
+    return config, seed, state.score, state.level, state.tick, state.game_over, time.perf_counter() - start
+
+
+# "name=v1,v2,..." -> (name, [v1, v2, ...])
+def parse_set(text):
+    name, _, values = text.partition('=')
+    if name not in TUNING:
+        raise argparse.ArgumentTypeError(f"unknown parameter {name!r} (choose from {', '.join(TUNING)})")
+    try:
+        return name, [float(v) for v in values.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad values for {name}: {values!r}")
+
+
+def summarize(configs, results):
+    n_configs = len(configs)
+    config = results['config']
+    max_level = int(results['level'].max())
+    levels = np.arange(1, max_level + 1)
+    survival = np.zeros((n_configs, max_level))
+    score = np.zeros((n_configs, 3))
+    ticks_mean = np.zeros(n_configs)
+    seconds_mean = np.zeros(n_configs)
+    for c in range(n_configs):
+        mine = config == c
+        # Share of games that reached each level
+        survival[c] = (results['level'][mine][:, None] >= levels).mean(axis=0)
+        score[c] = np.percentile(results['score'][mine], [10, 50, 90])
+        ticks_mean[c] = results['ticks'][mine].mean()
+        seconds_mean[c] = results['seconds'][mine].mean()
+    return {'survival': survival, 'score_p10_p50_p90': score, 'ticks_mean': ticks_mean,
+            'seconds_mean': seconds_mean}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aether Onslaught tuning sweeps")
+    parser.add_argument("--set", dest="sets", action="append", type=parse_set, default=[],
+                        metavar="NAME=V1,V2", help=f"values to sweep for one of: {', '.join(TUNING)}")
+    parser.add_argument("--games", type=int, default=100, help="games per configuration")
+    parser.add_argument("--seed", type=int, default=0, help="first game seed")
+    parser.add_argument("--policy", choices=list(POLICIES), default='autopilot')
+    parser.add_argument("--max-ticks", type=int, default=200000, help="stop games that run longer")
+    parser.add_argument("--tick-rate", type=int, default=BASE_TICK_RATE,
+                        help="simulation rate (chances and speeds are rescaled, so this mostly trades accuracy for speed)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default="sweep.npz")
+    args = parser.parse_args(argv)
+
+    names = [name for name, _ in args.sets]
+    configs = list(itertools.product(*[values for _, values in args.sets]))
+    tasks = [(c, dict(zip(names, values)), args.seed + g, args.policy, args.max_ticks, args.tick_rate)
+             for c, values in enumerate(configs) for g in range(args.games)]
+    total = len(tasks)
+    columns = {
+        'config': np.zeros(total, np.int32),
+        'seed': np.zeros(total, np.int64),
+        'score': np.zeros(total, np.int32),
+        'level': np.zeros(total, np.int16),
+        'ticks': np.zeros(total, np.int64),
+        'finished': np.zeros(total, np.bool_),
+        'seconds': np.zeros(total),
+    }
+    print(f"{len(configs)} configurations x {args.games} games on {args.workers} workers")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers) as pool:
+        chunksize = max(1, total // (args.workers * 8))
+        for row, result in enumerate(pool.map(play_one, tasks, chunksize=chunksize)):
+            for column, value in zip(columns.values(), result):
+                column[row] = value
+            if (row + 1) % max(1, total // 20) == 0 or row + 1 == total:
+                elapsed = time.perf_counter() - start
+                print(f"  {row + 1}/{total} games, {elapsed:.1f}s elapsed, "
+                      f"{elapsed / (row + 1) * (total - row - 1):.0f}s left")
+
+    summary = summarize(configs, columns)
+    np.savez_compressed(args.out, param_names=np.array(names, dtype=str),
+                        param_values=np.array(configs, dtype=float).reshape(len(configs), len(names)),
+                        policy=args.policy, tick_rate=args.tick_rate, **columns, **summary)
+
+    levels = summary['survival'].shape[1]
+    print(" ".join(f"{name:>18}" for name in names) + f" {'p50 score':>10} {'mean ticks':>11}  "
+          + " ".join(f"L{level:<4}" for level in range(2, min(levels, 12) + 1)))
+    for c, values in enumerate(configs):
+        print(" ".join(f"{v:>18g}" for v in values) +
+              f" {summary['score_p10_p50_p90'][c, 1]:>10.0f} {summary['ticks_mean'][c]:>11.0f}  " +
+              " ".join(f"{s:<5.2f}" for s in summary['survival'][c, 1:12]))
+    print(f"Wrote {args.out} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
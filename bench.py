@@ -0,0 +1,209 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+from entities import BOMBER
+from game_state import (
+    GameState, SIM_RATE, START_LIVES, WIDTH, HEIGHT, ENEMY_COLS, MEGA_LEVEL, autopilot,
+)
+
+# Scenario benchmarks for the game loop.
+# Each scenario sets up a GameState, drives it with the autopilot and times
+# every tick: the GameState.step() update and, unless --no-render, drawing
+# the frame with the real renderer. Rendering uses SDL's dummy video and
+# audio drivers unless --window is given. Results print as a table and can be
+# saved as JSON (--out) and compared against an earlier run (--compare).
+#
+#   python bench.py --out before.json
+#   python bench.py --compare before.json
+
+def setup_level1(state):
+    pass
+
+
+# Level 7 formation: five rows, elites in front with a row of bombers behind
+def setup_level7(state):
+    state.level = 7
+    state.create_enemies(7)
+    state.enemies.kind[ENEMY_COLS:2 * ENEMY_COLS] = BOMBER
+    state.schedule_enemy_actions()
+
+
+# Mega alien that bombs constantly and does not die
+def setup_mega(state):
+    state.level = MEGA_LEVEL
+    state.create_enemies(MEGA_LEVEL)
+    state.enemies.health[0] = 30000
+    state.mega_bomb_chance = 0.25
+    state.schedule_enemy_actions()
+
+
+STRESS_BULLETS = 2000
+STRESS_BOMBS = 2000
+
+
+# Keep thousands of bullets and bombs on screen every tick
+def refill_stress(state):
+    rng = state.rng
+    missing = max(0, STRESS_BULLETS - state.bullets.count)
+    for x, y in zip(rng.uniform(0, WIDTH, missing).tolist(), rng.uniform(0, HEIGHT, missing).tolist()):
+        state.bullets.add(x, y, vy=-state.bullet_speed)
+    missing = max(0, STRESS_BOMBS - state.bombs.count)
+    for x, y in zip(rng.uniform(0, WIDTH, missing).tolist(), rng.uniform(0, HEIGHT - 120, missing).tolist()):
+        state.bombs.add(x, y, vy=state.bomb_speed)
+
+
+def setup_stress(state):
+    state.level = 7
+    state.create_enemies(7)
+    refill_stress(state)
+
+
+# name -> (setup, per-tick hook or None, default ticks)
+SCENARIOS = {
+    'level1': (setup_level1, None, 3000),
+    'level7': (setup_level7, None, 3000),
+    'mega': (setup_mega, None, 3000),
+    'stress': (setup_stress, refill_stress, 600),
+}
+
+
+def percentiles(samples_ms):
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {'p50': round(float(p50), 4), 'p95': round(float(p95), 4), 'p99': round(float(p99), 4),
+            'max': round(float(np.max(samples_ms)), 4)}
+
+
+def run_scenario(name, ticks, seed, tick_rate, draw=None):
+    setup, hook, _ = SCENARIOS[name]
+    state = GameState(seed, tick_rate)
+    setup(state)
+    update_ms = np.zeros(ticks)
+    frame_ms = np.zeros(ticks)
+    perf = time.perf_counter
+    start = perf()
+    for i in range(ticks):
+        if hook:
+            hook(state)
+        t0 = perf()
+        state.step(autopilot(state))
+        t1 = perf()
+        # Lives are topped up so a scenario never ends early
+        state.lives = START_LIVES
+        if draw:
+            draw(state)
+        t2 = perf()
+        update_ms[i] = (t1 - t0) * 1000
+        frame_ms[i] = (t2 - t0) * 1000
+    elapsed = perf() - start
+    result = {
+        'ticks': ticks,
+        'seconds': round(elapsed, 4),
+        'ticks_per_s': round(ticks / elapsed, 1),
+        'update_ms': percentiles(update_ms),
+        'frame_ms': percentiles(frame_ms),
+        'entities': {'bullets': state.bullets.count, 'bombs': state.bombs.count,
+                     'enemies': state.enemies.count, 'explosions': state.explosions.count},
+        'pools': state.pool_stats(),
+    }
+    if draw:
+        result['render_ms'] = percentiles(frame_ms - update_ms)
+    return result
+
+
+# Set up the real renderer and return a draw(state) callback, one call per tick
+def make_drawer(window, tick_rate):
+    if not window:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    import AetherOnslaught as game
+    game.DEBUG = False
+    game.init_game()
+    renderer = game.FullRenderer(game.display, game.background)
+    particles = game.particles
+    seen = {'state': None, 'uid': 0}
+
+    def draw(state):
+        pygame.event.pump()
+        if seen['state'] is not state:
+            particles.clear()
+            seen['state'], seen['uid'] = state, 0
+        particles.update(1.0 / tick_rate)
+        seen['uid'] = game.spawn_explosion_effects(state, seen['uid'])
+        renderer.begin()
+        game.draw_game(state, renderer, particles=particles)
+        renderer.present()
+    return draw
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print(f"{'scenario':<10} {'ticks/s':>10} {'upd p50':>9} {'upd p95':>9} {'upd p99':>9} "
+          f"{'frm p50':>9} {'frm p95':>9} {'frm p99':>9}" + ("  vs baseline" if baseline else ""))
+    for name, r in results['scenarios'].items():
+        u = r['update_ms']
+        f = r['frame_ms']
+        line = (f"{name:<10} {r['ticks_per_s']:>10.0f} {u['p50']:>9.3f} {u['p95']:>9.3f} {u['p99']:>9.3f} "
+                f"{f['p50']:>9.3f} {f['p95']:>9.3f} {f['p99']:>9.3f}")
+        old = baseline['scenarios'].get(name) if baseline else None
+        if old:
+            line += f"  {r['ticks_per_s'] / old['ticks_per_s']:.2f}x ticks/s, p99 frame {f['p99'] - old['frame_ms']['p99']:+.3f} ms"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aether Onslaught scenario benchmarks")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--ticks", type=int, help="ticks per scenario (default: per scenario)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tick-rate", type=int, default=SIM_RATE)
+    parser.add_argument("--no-render", action="store_true", help="time the simulation only")
+    parser.add_argument("--window", action="store_true", help="render to a real window")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON from an earlier run to compare against")
+    args = parser.parse_args(argv)
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}")
+
+    draw = None if args.no_render else make_drawer(args.window, args.tick_rate)
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'render': not args.no_render,
+        'tick_rate': args.tick_rate,
+        'seed': args.seed,
+        'scenarios': {},
+    }
+    for name in args.scenarios or list(SCENARIOS):
+        ticks = args.ticks or SCENARIOS[name][2]
+        results['scenarios'][name] = run_scenario(name, ticks, args.seed, args.tick_rate, draw)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+import pygame
+
+# In-game video capture for attract loops and bug reports.
+# capture(surface) copies the surface's raw pixel buffer into one of a few
+# preallocated NumPy slots (a single memcpy, about 0.2 ms for 800x600) and
+# queues the slot for a worker thread, which converts and writes it:
+#   y4m  raw YUV 4:2:0 video (YUV4MPEG2), playable with ffplay/mpv or
+#        encodable with ffmpeg -i game.y4m game.mp4
+#   png  numbered PNG files in a directory, encoded here with zlib (which,
+#        unlike pygame.image.save, lets the game thread run meanwhile)
+# Frames offered faster than fps (an uncapped frame rate) are skipped so the
+# video plays at the game's speed.
+# When the worker falls behind and no slot is free, the frame is dropped and
+# counted instead of stalling the game. A Y4M video writes the next frame
+# once more per dropped frame, so it keeps the game's timing; a PNG sequence
+# just skips the numbers.
+
+FORMATS = ('y4m', 'png')
+SLOTS = 8
+
+
+class CaptureError(Exception):
+    pass
+
+
+class VideoRecorder:
+    # path is a .y4m file or a directory for PNGs; size and pixel layout are
+    # taken from the surface frames will come from
+    def __init__(self, path, surface, fps=60, fmt='y4m', slots=SLOTS, log=print):
+        if fmt not in FORMATS:
+            raise CaptureError(f"unknown capture format {fmt!r}, expected one of {', '.join(FORMATS)}")
+        if surface.get_bytesize() not in (3, 4):
+            raise CaptureError(f"can't capture {surface.get_bitsize()}-bit surfaces")
+        self.path = path
+        self.fmt = fmt
+        self.fps = fps
+        self.log = log
+        self.width, self.height = surface.get_size()
+        self.bytesize = surface.get_bytesize()
+        # Byte offset of red, green and blue within a pixel (little endian)
+        self.channels = [shift // 8 for shift in surface.get_shifts()[:3]]
+        self.slots = np.empty((slots, self.height, surface.get_pitch()), np.uint8)
+        self.free = queue.Queue()
+        for slot in range(slots):
+            self.free.put(slot)
+        self.filled = queue.Queue()
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.skipped = 0  # drops not yet made up for
+        self.error = None
+        self.started = time.perf_counter()
+        self.interval = 1.0 / fps
+        self.next_frame = self.started
+
+        if fmt == 'y4m':
+            self.file = open(path, 'wb')
+            self.file.write(f"YUV4MPEG2 W{self.width} H{self.height} F{fps}:1 Ip A1:1 C420jpeg\n".encode())
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.file = None
+        self.worker = threading.Thread(target=self._run, name="video capture", daemon=True)
+        self.worker.start()
+
+    # Grab one frame; never blocks
+    def capture(self, surface):
+        if self.error:
+            return
+        now = time.perf_counter()
+        # Half a frame of slack keeps frame-time jitter from skipping frames
+        if now < self.next_frame - self.interval / 2:
+            return
+        self.next_frame = max(self.next_frame + self.interval, now)
+        try:
+            slot = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            self.skipped += 1
+            return
+        self.slots[slot] = np.frombuffer(surface.get_buffer(), np.uint8).reshape(self.height, -1)
+        self.filled.put((slot, self.skipped + 1))
+        self.skipped = 0
+        self.captured += 1
+
+    def _rgb(self, slot):
+        pixels = self.slots[slot][:, :self.width * self.bytesize].reshape(self.height, self.width, self.bytesize)
+        return pixels[:, :, self.channels]
+
+    def _run(self):
+        index = 0
+        while True:
+            item = self.filled.get()
+            if item is None:
+                return
+            slot, copies = item
+            try:
+                if self.error is None:
+                    if self.fmt == 'y4m':
+                        frame = b"FRAME\n" + yuv420(self._rgb(slot))
+                        for _ in range(copies):
+                            self.file.write(frame)
+                        self.written += copies
+                    else:
+                        index += copies
+                        with open(os.path.join(self.path, f"frame_{index:06d}.png"), 'wb') as f:
+                            f.write(png(self._rgb(slot)))
+                        self.written += 1
+            except OSError as e:
+                self.error = e
+                self.log(f"Video capture stopped: {e}")
+            finally:
+                self.free.put(slot)
+
+    # Finish writing the queued frames; returns a one-line summary
+    def close(self):
+        self.filled.put(None)
+        self.worker.join()
+        if self.file:
+            self.file.close()
+        seconds = time.perf_counter() - self.started
+        return (f"{self.path}: {self.captured} frames captured, {self.dropped} dropped, "
+                f"{self.written} written in {seconds:.1f}s")
+
+
+# Full-range BT.601 (as in JPEG) YUV 4:2:0 planes of an (h, w, 3) RGB frame,
+# in integer arithmetic
+def yuv420(rgb):
+    r, g, b = (rgb[:, :, i].astype(np.int32) for i in range(3))
+    y = (77 * r + 150 * g + 29 * b + 128) >> 8
+    # Chroma from 2x2 block averages (odd edges repeat the last row/column)
+    h, w = y.shape
+    pad = ((0, h % 2), (0, w % 2))
+    r, g, b = (np.pad(c, pad, mode='edge') for c in (r, g, b))
+    r, g, b = (c[0::2, 0::2] + c[1::2, 0::2] + c[0::2, 1::2] + c[1::2, 1::2] for c in (r, g, b))
+    u = ((-43 * r - 85 * g + 128 * b + 512) >> 10) + 128
+    v = ((128 * r - 107 * g - 21 * b + 512) >> 10) + 128
+    return b"".join(np.clip(plane, 0, 255).astype(np.uint8).tobytes() for plane in (y, u, v))
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+# PNG file of an (h, w, 3) RGB frame: unfiltered rows, fast compression
+def png(rgb, level=1):
+    h, w, _ = rgb.shape
+    rows = np.zeros((h, 1 + 3 * w), np.uint8)  # each row starts with filter type 0
+    rows[:, 1:] = rgb.reshape(h, 3 * w)
+    return (b"\x89PNG\r\n\x1a\n" +
+            _png_chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0)) +
+            _png_chunk(b"IDAT", zlib.compress(rows.tobytes(), level)) +
+            _png_chunk(b"IEND", b""))
+
+
+if __name__ == "__main__":
+    # Capture cost and worker throughput on a synthetic 800x600 scene
+    fmt = sys.argv[1] if len(sys.argv) > 1 else 'y4m'
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((800, 600))
+    surface = pygame.Surface((800, 600)).convert()
+    path = "capture_test.y4m" if fmt == 'y4m' else "capture_test"
+    recorder = VideoRecorder(path, surface, 60, fmt)
+    clock = pygame.time.Clock()
+    worst = total = 0.0
+    for i in range(frames):
+        surface.fill((i % 256, 80, 160))
+        pygame.draw.circle(surface, (255, 255, 0), (i * 3 % 800, 300), 40)
+        start = time.perf_counter()
+        recorder.capture(surface)
+        elapsed = time.perf_counter() - start
+        worst = max(worst, elapsed)
+        total += elapsed
+        clock.tick(60)
+    print(recorder.close())
+    print(f"capture: {total / frames * 1000:.2f} ms average, {worst * 1000:.2f} ms worst")
@@ -0,0 +1,95 @@
+from collections import namedtuple
+
+import numpy as np
+
+from entities import MEGA
+
+# Collision engine for the simulation.
+# Broad phase is a sorted sweep on x: points are sorted once per call and each
+# box finds its candidate x-range with two binary searches. The narrow phase
+# then checks y for every candidate pair in one vectorised test, so cost grows
+# with the number of real overlaps rather than with points x boxes.
+
+EMPTY = np.zeros(0, np.intp)
+
+# All contacts for one tick, as index arrays into the state's stores.
+# bullet_hits/enemy_hits are paired (at most one bullet per enemy per tick),
+# bomb_hits and diver_hits index bombs and enemies that reached the player.
+Hits = namedtuple('Hits', ['bullet_hits', 'enemy_hits', 'bomb_hits', 'diver_hits'])
+NO_HITS = Hits(EMPTY, EMPTY, EMPTY, EMPTY)
+
+
+# Every (point, box) pair where the point lies inside the box, edges included
+def points_in_boxes(px, py, bx, by, bw, bh):
+    if not len(px) or not len(bx):
+        return EMPTY, EMPTY
+    order = np.argsort(px, kind='stable')
+    sx = px[order]
+    lo = np.searchsorted(sx, bx, 'left')
+    hi = np.searchsorted(sx, bx + bw, 'right')
+    counts = hi - lo
+    total = int(counts.sum())
+    if not total:
+        return EMPTY, EMPTY
+    box_idx = np.repeat(np.arange(len(bx)), counts)
+    run_start = np.repeat(np.cumsum(counts) - counts, counts)
+    point_idx = order[np.repeat(lo, counts) + np.arange(total) - run_start]
+    y = py[point_idx]
+    top = by[box_idx]
+    inside = (y >= top) & (y <= top + bh[box_idx])
+    return point_idx[inside], box_idx[inside]
+
+
+# Reduce candidate pairs so each box takes at most one point and each point
+# is used at most once. Pairs arrive grouped by box.
+def one_per_box(point_idx, box_idx):
+    if not len(point_idx):
+        return EMPTY, EMPTY
+    used = set()
+    points = []
+    boxes = []
+    last_box = -1
+    for p, b in zip(point_idx.tolist(), box_idx.tolist()):
+        if b == last_box or p in used:
+            continue
+        used.add(p)
+        last_box = b
+        points.append(p)
+        boxes.append(b)
+    return np.array(points, np.intp), np.array(boxes, np.intp)
+
+
+# Player hitbox as a one-element box array
+def _player_box(state, width, height):
+    return (np.array([state.player_x], np.float32), np.array([state.player_y], np.float32),
+            np.array([width], np.float32), np.array([height], np.float32))
+
+
+# Collect every contact for the current tick in one call
+def find_hits(state, enemy_size, mega_size, player_size):
+    enemies = state.enemies
+    bullets = state.bullets
+    bombs = state.bombs
+    n = enemies.count
+
+    bullet_hits = enemy_hits = EMPTY
+    if n and bullets.count:
+        b = bullets.count
+        is_mega = enemies.kind[:n] == MEGA
+        w = np.where(is_mega, mega_size[0], enemy_size[0])
+        h = np.where(is_mega, mega_size[1], enemy_size[1])
+        pairs = points_in_boxes(bullets.x[:b], bullets.y[:b], enemies.x[:n], enemies.y[:n], w, h)
+        bullet_hits, enemy_hits = one_per_box(*pairs)
+
+    bomb_hits = diver_hits = EMPTY
+    if not state.player_explosion:
+        player = _player_box(state, *player_size)
+        if bombs.count:
+            b = bombs.count
+            bomb_hits, _ = points_in_boxes(bombs.x[:b], bombs.y[:b], *player)
+        divers = np.flatnonzero(enemies.diving[:n])
+        if len(divers):
+            hit, _ = points_in_boxes(enemies.x[divers], enemies.y[divers], *player)
+            diver_hits = divers[hit]
+
+    return Hits(bullet_hits, enemy_hits, bomb_hits, diver_hits)
@@ -0,0 +1,97 @@
+import pygame
+
+# Window setup and output scaling.
+# The game always draws on a fixed logical canvas (WIDTH x HEIGHT). When the
+# window is exactly that size the canvas is the display surface and presenting
+# is a plain flip, as before. Otherwise the canvas is an offscreen surface and
+# presenting scales it once into the largest centred viewport that keeps the
+# aspect ratio, with black bars around it:
+#   integer  whole-number factor, nearest-neighbour pixels. Dirty rects are
+#            scaled individually, so partial updates stay cheap at 4K. An
+#            output under twice the logical size (1080p for 800x600) would
+#            only get 1x, so it falls back to smooth and fills the screen.
+#   smooth   fills as much of the screen as possible with filtered scaling.
+#   gpu      leaves the scaling to SDL's renderer (pygame.SCALED): the canvas
+#            is the display surface and the GPU stretches it at flip time,
+#            which is the cheapest option at 4K when a GPU renderer exists.
+# A viewport of exactly the logical size (a window only taller or wider than
+# the canvas) is copied with plain blits instead, dirty rects one by one.
+# Sprites and text are drawn once at logical size, so the output resolution
+# only costs the one scaling pass, never anything per entity.
+
+SCALE_MODES = ('integer', 'smooth', 'gpu')
+
+
+class Display:
+    # window_size None means the logical size; fullscreen uses the desktop size
+    def __init__(self, size, scale='integer', fullscreen=False, window_size=None):
+        self.size = size
+        if scale == 'gpu':
+            flags = pygame.SCALED | (pygame.FULLSCREEN if fullscreen else 0)
+            self.window = self.canvas = pygame.display.set_mode(size, flags)
+            self.scale = scale
+            self.factor = 1
+            self.viewport = self.canvas.get_rect()
+            self.scaled = False
+            return
+        if fullscreen:
+            self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.window = pygame.display.set_mode(window_size or size)
+        out_w, out_h = self.window.get_size()
+        w, h = size
+        # Integer scaling needs at least 2x to be worth it (or no scaling at
+        # all); other outputs are scaled smoothly
+        factor = min(out_w // w, out_h // h)
+        if scale == 'integer' and (factor >= 2 or (out_w, out_h) == (w, h)):
+            self.factor = factor
+            view_w, view_h = w * self.factor, h * self.factor
+        else:
+            scale = 'smooth'
+            self.factor = min(out_w / w, out_h / h)
+            view_w, view_h = round(w * self.factor), round(h * self.factor)
+        self.scale = scale
+        self.viewport = pygame.Rect((out_w - view_w) // 2, (out_h - view_h) // 2, view_w, view_h)
+        self.scaled = self.window.get_size() != tuple(size)
+        if self.scaled:
+            self.canvas = pygame.Surface(size).convert()
+            self.target = self.window.subsurface(self.viewport)
+            self.window.fill((0, 0, 0))
+        else:
+            self.canvas = self.window
+
+    def _scale_all(self):
+        if self.factor == 1:
+            self.target.blit(self.canvas, (0, 0))
+        elif self.scale == 'integer':
+            pygame.transform.scale(self.canvas, self.viewport.size, self.target)
+        else:
+            pygame.transform.smoothscale(self.canvas, self.viewport.size, self.target)
+
+    # Show the whole canvas
+    def flip(self):
+        if self.scaled:
+            self._scale_all()
+        pygame.display.flip()
+
+    # Show only these canvas rects (already clipped to the canvas)
+    def update(self, rects):
+        if not self.scaled:
+            pygame.display.update(rects)
+            return
+        k = self.factor
+        if self.scale != 'integer' and k != 1:
+            self.flip()
+            return
+        left, top = self.viewport.topleft
+        window_rects = []
+        for rect in rects:
+            if not rect.w or not rect.h:
+                continue
+            dest = pygame.Rect(left + rect.x * k, top + rect.y * k, rect.w * k, rect.h * k)
+            if k == 1:
+                self.window.blit(self.canvas, dest, rect)
+            else:
+                pygame.transform.scale(self.canvas.subsurface(rect), dest.size, self.window.subsurface(dest))
+            window_rects.append(dest)
+        pygame.display.update(window_rects)
@@ -0,0 +1,130 @@
+import numpy as np
+
+# Structure-of-arrays entity storage for bullets, bombs, explosions and enemies.
+# Each field is one contiguous NumPy array and the first `count` slots are in
+# use, so a whole layer moves, ages and culls in a handful of array operations.
+# A store doubles as an object pool: add() hands out the next free slot and
+# compact() gives dead slots back, so nothing is allocated per entity.
+# Arrays only grow when the live count passes the capacity; high_water and
+# grows show whether a store's starting capacity is big enough.
+
+# Enemy type codes stored in `kind`
+NORMAL = 0
+BOMBER = 1
+ELITE = 2
+MEGA = 3
+KIND_NAMES = ("normal", "bomber", "elite", "mega")
+
+BASE_FIELDS = (
+    ('x', np.float32),
+    ('y', np.float32),
+    ('px', np.float32),    # position at the start of the tick, for interpolation
+    ('py', np.float32),
+    ('vx', np.float32),
+    ('vy', np.float32),
+    ('kind', np.int8),
+    ('alive', np.bool_),
+)
+
+
+class EntityStore:
+    def __init__(self, capacity=64, extra_fields=()):
+        self.fields = BASE_FIELDS + tuple(extra_fields)
+        self.capacity = capacity
+        self.count = 0
+        self.high_water = 0
+        self.grows = 0
+        for name, dtype in self.fields:
+            setattr(self, name, np.zeros(capacity, dtype))
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        self.capacity *= 2
+        self.grows += 1
+        for name, dtype in self.fields:
+            old = getattr(self, name)
+            new = np.zeros(self.capacity, dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    # Make room for at least count entities
+    def reserve(self, count):
+        while self.capacity < count:
+            self._grow()
+
+    # Append one entity and return its slot. Extra fields are passed by name.
+    def add(self, x, y, vx=0.0, vy=0.0, kind=0, **extra):
+        if self.count == self.capacity:
+            self._grow()
+        i = self.count
+        self.x[i] = self.px[i] = x
+        self.y[i] = self.py[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.kind[i] = kind
+        self.alive[i] = True
+        for name, value in extra.items():
+            getattr(self, name)[i] = value
+        self.count += 1
+        if self.count > self.high_water:
+            self.high_water = self.count
+        return i
+
+    def stats(self):
+        return {'high_water': self.high_water, 'capacity': self.capacity, 'grows': self.grows}
+
+    def clear(self):
+        self.alive[:self.count] = False
+        self.count = 0
+
+    def save_previous(self):
+        n = self.count
+        self.px[:n] = self.x[:n]
+        self.py[:n] = self.y[:n]
+
+    # Integrate velocities for every live slot
+    def move(self):
+        n = self.count
+        if not n:
+            return
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+
+    # Mark everything outside [min_y, max_y] dead
+    def cull(self, min_y, max_y):
+        n = self.count
+        if not n:
+            return
+        y = self.y[:n]
+        self.alive[:n] &= (y >= min_y) & (y <= max_y)
+
+    # Drop every dead slot at once. Holes in the surviving prefix are filled
+    # from live entities past it, so only the moved slots are copied.
+    def compact(self):
+        n = self.count
+        if not n:
+            return
+        alive = self.alive[:n]
+        keep = int(np.count_nonzero(alive))
+        if keep == n:
+            return
+        holes = np.flatnonzero(~alive[:keep])
+        movers = np.flatnonzero(alive[keep:]) + keep
+        for name, _ in self.fields:
+            arr = getattr(self, name)
+            arr[holes] = arr[movers]
+        self.alive[keep:n] = False
+        self.count = keep
+
+    # Iterate (x, y) pairs of live slots as Python numbers, for drawing.
+    # alpha < 1 blends from the previous tick's positions.
+    def positions(self, alpha=1.0):
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        if alpha < 1.0:
+            x = self.px[:n] + (x - self.px[:n]) * alpha
+            y = self.py[:n] + (y - self.py[:n]) * alpha
+        return zip(x.tolist(), y.tolist())
@@ -0,0 +1,286 @@
+import argparse
+import time
+
+import numpy as np
+
+from entities import MEGA
+from game_state import (
+    BASE_TICK_RATE, HEIGHT, WIDTH, START_LIVES, ENEMY_COLS, MEGA_HEALTH,
+    PLAYER_WIDTH, PLAYER_HEIGHT, ENEMY_WIDTH, ENEMY_HEIGHT, MEGA_WIDTH, MEGA_HEIGHT,
+    BULLET_WIDTH, BULLET_HEIGHT, BOMB_WIDTH, BOMB_HEIGHT, GameState, Inputs,
+)
+
+# Reinforcement learning environments over the game rules (Gym-style API,
+# no Gym dependency).
+#   reset(seed=None)  -> observation, info
+#   step(action)      -> observation, reward, terminated, truncated, info
+# Actions index ACTIONS (nothing, left, right, fire, left+fire, right+fire).
+# Each step holds the action for frame_skip ticks; fire is a key press on the
+# first of them, like a player tapping the fire key. The reward is the score
+# gained minus death_penalty per life lost; an episode ends at game over
+# (terminated) or after max_ticks (truncated).
+#
+# Observations are either
+#   features  FEATURE_SIZE float32s: the player, the formation, and the
+#             NEAREST_ENEMIES enemies and NEAREST_BOMBS bombs closest to the
+#             player, relative to it
+#   pixels    uint8 planes (player, enemies, bullets, bombs) of the screen
+#             downsampled PIXEL_SCALE times, painted straight from the entity
+#             stores without pygame
+#
+# VecEnv runs N games side by side with their own seeds and resets each one
+# as soon as it ends (the last observation of the finished episode goes in
+# its info as 'final_observation'). Observations, rewards and flags come back
+# as (N, ...) arrays written into preallocated buffers. The games themselves
+# step one by one through GameState, which keeps them identical to the real
+# game and its replays; with the default 60 ticks/s and frame skip of 4 one
+# core makes a few million samples an hour, and separate processes scale it
+# across cores (see batch.py). python env.py measures it.
+
+ACTIONS = (
+    Inputs(),
+    Inputs(left=True),
+    Inputs(right=True),
+    Inputs(fire=True),
+    Inputs(left=True, fire=True),
+    Inputs(right=True, fire=True),
+)
+HELD = tuple(action._replace(fire=False) for action in ACTIONS)  # ticks after the first
+
+OBSERVATIONS = ('features', 'pixels')
+NEAREST_ENEMIES = 8
+NEAREST_BOMBS = 8
+PLAYER_FEATURES = 7
+ENEMY_FEATURES = 5   # dx, dy, kind, diving, present
+BOMB_FEATURES = 3    # dx, dy, present
+FEATURE_SIZE = PLAYER_FEATURES + NEAREST_ENEMIES * ENEMY_FEATURES + NEAREST_BOMBS * BOMB_FEATURES
+PIXEL_SCALE = 10
+PIXEL_SHAPE = (4, HEIGHT // PIXEL_SCALE, WIDTH // PIXEL_SCALE)
+
+FRAME_SKIP = 4
+MAX_TICKS = 60 * 60 * BASE_TICK_RATE  # an hour of game time
+DEATH_PENALTY = 50
+
+
+# Write the feature vector of state into out (FEATURE_SIZE float32s)
+def features(state, out):
+    out[:] = 0
+    center = state.player_x + PLAYER_WIDTH / 2
+    top = state.player_y
+    enemies = state.enemies
+    n = enemies.count
+    kind = enemies.kind[:n]
+    out[0] = center / WIDTH
+    out[1] = bool(state.player_explosion)
+    out[2] = state.lives / START_LIVES
+    out[3] = n / (5 * ENEMY_COLS)
+    bottom = state.formation.bottom()
+    out[4] = bottom / HEIGHT if np.isfinite(bottom) else 0.0
+    out[5] = state.formation.direction
+    mega = np.flatnonzero(kind == MEGA)
+    if len(mega):
+        out[6] = enemies.health[mega[0]] / MEGA_HEALTH
+
+    if n:
+        width = np.where(kind == MEGA, MEGA_WIDTH, ENEMY_WIDTH)
+        height = np.where(kind == MEGA, MEGA_HEIGHT, ENEMY_HEIGHT)
+        dx = (enemies.x[:n] + width / 2 - center) / WIDTH
+        dy = (top - enemies.y[:n] - height) / HEIGHT
+        nearest = _nearest(np.abs(dx), NEAREST_ENEMIES)
+        k = len(nearest)
+        rows = out[PLAYER_FEATURES:PLAYER_FEATURES + NEAREST_ENEMIES * ENEMY_FEATURES].reshape(-1, ENEMY_FEATURES)
+        rows[:k, 0] = dx[nearest]
+        rows[:k, 1] = dy[nearest]
+        rows[:k, 2] = kind[nearest] / MEGA
+        rows[:k, 3] = enemies.diving[:n][nearest]
+        rows[:k, 4] = 1.0
+
+    bombs = state.bombs
+    n = bombs.count
+    if n:
+        dx = (bombs.x[:n] + BOMB_WIDTH / 2 - center) / WIDTH
+        dy = (top - bombs.y[:n] - BOMB_HEIGHT) / HEIGHT
+        nearest = _nearest(dx * dx + dy * dy, NEAREST_BOMBS)
+        k = len(nearest)
+        rows = out[PLAYER_FEATURES + NEAREST_ENEMIES * ENEMY_FEATURES:].reshape(-1, BOMB_FEATURES)
+        rows[:k, 0] = dx[nearest]
+        rows[:k, 1] = dy[nearest]
+        rows[:k, 2] = 1.0
+    return out
+
+
+# Indices of the k smallest distances, closest first
+def _nearest(distance, k):
+    if len(distance) > k:
+        candidates = np.argpartition(distance, k)[:k]
+        return candidates[np.argsort(distance[candidates])]
+    return np.argsort(distance)
+
+
+# Set every cell a box of size (w, h) at each (x, y) touches
+def _paint(plane, x, y, w, h):
+    rows, cols = plane.shape
+    visible = (x + w > 0) & (x < WIDTH) & (y + h > 0) & (y < HEIGHT)
+    x = x[visible]
+    y = y[visible]
+    if not len(x):
+        return
+    c0 = np.clip(x // PIXEL_SCALE, 0, cols - 1).astype(np.intp)
+    c1 = np.clip((x + w - 1) // PIXEL_SCALE, 0, cols - 1).astype(np.intp)
+    r0 = np.clip(y // PIXEL_SCALE, 0, rows - 1).astype(np.intp)
+    r1 = np.clip((y + h - 1) // PIXEL_SCALE, 0, rows - 1).astype(np.intp)
+    # Same-size boxes span the same number of cells, give or take one; the
+    # extra cell is clamped back onto the last one
+    span_c = np.arange(-(-w // PIXEL_SCALE) + 1)
+    span_r = np.arange(-(-h // PIXEL_SCALE) + 1)
+    col_idx = np.minimum(c0[:, None] + span_c, c1[:, None])
+    row_idx = np.minimum(r0[:, None] + span_r, r1[:, None])
+    plane[row_idx[:, :, None], col_idx[:, None, :]] = 255
+
+
+# Write the downsampled planes of state into out (PIXEL_SHAPE uint8s)
+def pixels(state, out):
+    out[:] = 0
+    if not state.player_explosion:
+        _paint(out[0], np.array([state.player_x]), np.array([state.player_y]), PLAYER_WIDTH, PLAYER_HEIGHT)
+    enemies = state.enemies
+    n = enemies.count
+    mega = enemies.kind[:n] == MEGA
+    _paint(out[1], enemies.x[:n][~mega], enemies.y[:n][~mega], ENEMY_WIDTH, ENEMY_HEIGHT)
+    _paint(out[1], enemies.x[:n][mega], enemies.y[:n][mega], MEGA_WIDTH, MEGA_HEIGHT)
+    bullets = state.bullets
+    _paint(out[2], bullets.x[:bullets.count], bullets.y[:bullets.count], BULLET_WIDTH, BULLET_HEIGHT)
+    bombs = state.bombs
+    _paint(out[3], bombs.x[:bombs.count], bombs.y[:bombs.count], BOMB_WIDTH, BOMB_HEIGHT)
+    return out
+
+
+OBSERVERS = {
+    'features': (features, (FEATURE_SIZE,), np.float32),
+    'pixels': (pixels, PIXEL_SHAPE, np.uint8),
+}
+
+
+def _seed_sequence(seed):
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+
+class GameEnv:
+    # seed: int or np.random.SeedSequence; every reset without an explicit
+    # seed plays a new game seeded from it
+    def __init__(self, seed=None, observation='features', frame_skip=FRAME_SKIP, tick_rate=BASE_TICK_RATE,
+                 max_ticks=MAX_TICKS, death_penalty=DEATH_PENALTY, tuning=None):
+        if observation not in OBSERVERS:
+            raise ValueError(f"unknown observation {observation!r}, expected one of {', '.join(OBSERVATIONS)}")
+        self.observe, self.observation_shape, self.observation_dtype = OBSERVERS[observation]
+        self.n_actions = len(ACTIONS)
+        self.frame_skip = frame_skip
+        self.tick_rate = tick_rate
+        self.max_ticks = max_ticks
+        self.death_penalty = death_penalty
+        self.tuning = tuning
+        self._seeds = _seed_sequence(seed)
+        self.state = None
+
+    def _game_seed(self):
+        return int(self._seeds.spawn(1)[0].generate_state(1, np.uint64)[0] >> np.uint64(1))
+
+    def _observation(self, out=None):
+        if out is None:
+            out = np.empty(self.observation_shape, self.observation_dtype)
+        return self.observe(self.state, out)
+
+    def reset(self, seed=None, out=None):
+        if seed is not None:
+            self._seeds = _seed_sequence(seed)
+        self.state = GameState(self._game_seed(), self.tick_rate, self.tuning)
+        return self._observation(out), {'seed': self.state.seed}
+
+    # Advance the game; returns reward, terminated, truncated
+    def _advance(self, action):
+        state = self.state
+        score, lives = state.score, state.lives
+        state.step(ACTIONS[action])
+        held = HELD[action]
+        for _ in range(self.frame_skip - 1):
+            if state.game_over:
+                break
+            state.step(held)
+        reward = state.score - score - self.death_penalty * (lives - state.lives)
+        return reward, state.game_over, not state.game_over and state.tick >= self.max_ticks
+
+    def step(self, action, out=None):
+        reward, terminated, truncated = self._advance(action)
+        info = {'score': self.state.score, 'level': self.state.level, 'tick': self.state.tick}
+        return self._observation(out), float(reward), terminated, truncated, info
+
+
+class VecEnv:
+    def __init__(self, n, seed=None, **kwargs):
+        self.envs = [GameEnv(seeds, **kwargs) for seeds in np.random.SeedSequence(seed).spawn(n)]
+        first = self.envs[0]
+        self.n = n
+        self.n_actions = first.n_actions
+        self.observation_shape = first.observation_shape
+        self.observations = np.zeros((n,) + first.observation_shape, first.observation_dtype)
+        self.rewards = np.zeros(n, np.float32)
+        self.terminated = np.zeros(n, np.bool_)
+        self.truncated = np.zeros(n, np.bool_)
+
+    def __len__(self):
+        return self.n
+
+    # Observations (N, ...) and a list of infos. The returned arrays are
+    # reused by the next call; copy what has to outlive it.
+    def reset(self, seed=None):
+        seeds = np.random.SeedSequence(seed).spawn(self.n) if seed is not None else [None] * self.n
+        infos = [env.reset(s, self.observations[i])[1] for i, (env, s) in enumerate(zip(self.envs, seeds))]
+        return self.observations, infos
+
+    # actions: N action indices. Finished games restart at once; their last
+    # observation is in info['final_observation'].
+    def step(self, actions):
+        observations = self.observations
+        infos = []
+        for i, (env, action) in enumerate(zip(self.envs, np.asarray(actions).tolist())):
+            reward, terminated, truncated = env._advance(action)
+            self.rewards[i] = reward
+            self.terminated[i] = terminated
+            self.truncated[i] = truncated
+            state = env.state
+            info = {'score': state.score, 'level': state.level, 'tick': state.tick}
+            if terminated or truncated:
+                info['final_observation'] = env._observation()
+                info['reset'] = env.reset(out=observations[i])[1]
+            else:
+                env._observation(observations[i])
+            infos.append(info)
+        return observations, self.rewards, self.terminated, self.truncated, infos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure environment throughput with random actions.")
+    parser.add_argument('--envs', type=int, default=16)
+    parser.add_argument('--steps', type=int, default=2000, help="vector steps to run")
+    parser.add_argument('--observation', choices=OBSERVATIONS, default='features')
+    parser.add_argument('--frame-skip', type=int, default=FRAME_SKIP)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    envs = VecEnv(args.envs, args.seed, observation=args.observation, frame_skip=args.frame_skip)
+    envs.reset()
+    rng = np.random.default_rng(args.seed)
+    episodes = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        _, _, terminated, truncated, _ = envs.step(rng.integers(envs.n_actions, size=envs.n))
+        episodes += int(np.count_nonzero(terminated | truncated))
+    elapsed = time.perf_counter() - start
+    samples = args.steps * args.envs
+    print(f"{samples} samples in {elapsed:.2f}s: {samples / elapsed:.0f} samples/s "
+          f"({samples / elapsed * 3600 / 1e6:.1f}M/hour), {samples * args.frame_skip / elapsed:.0f} ticks/s, "
+          f"{episodes} episodes finished, observation {args.observation} {envs.observation_shape}")
+
+
+if __name__ == "__main__":
+    main()
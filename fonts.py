@@ -0,0 +1,22 @@
+import functools
+
+import pygame
+
+# Font registry and rendered-text cache.
+# SysFont scans the installed fonts on every call, so each face/size is looked
+# up once, and rendered strings are kept in a bounded LRU keyed by
+# (face, size, bold, text, colour). HUD text only re-renders when it changes.
+# The returned surfaces are shared: blit them, never draw onto them.
+
+DEFAULT_FACE = 'Arial'
+TEXT_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=None)
+def get_font(size, face=DEFAULT_FACE, bold=True):
+    return pygame.font.SysFont(face, size, bold=bold)
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(text, size, color, face=DEFAULT_FACE, bold=True):
+    return get_font(size, face, bold).render(text, True, color)
@@ -0,0 +1,77 @@
+import numpy as np
+
+from entities import MEGA
+
+# Shared movement for the enemy formation.
+# Every formation enemy owns a slot (home_x, home_y in the enemy store) and
+# sits at that slot plus one shared offset, so marching the swarm is a single
+# offset update. The edge and bottom tests use the extents of the occupied
+# slots, cached until the enemy count changes. Diving enemies leave their slot
+# and rejoin it wherever the formation has moved to by the time they return.
+
+STEP_DOWN = 20
+
+
+class Formation:
+    # max_x is the rightmost x a slot may reach before the formation turns
+    def __init__(self, enemies, max_x, speed_increase):
+        self.enemies = enemies
+        self.max_x = max_x
+        self.speed_increase = speed_increase
+        self.reset(0.0)
+
+    def reset(self, speed):
+        self.offset_x = 0.0
+        self.offset_y = 0.0
+        self.direction = 1
+        self.speed = speed
+        self.invalidate()
+
+    def invalidate(self):
+        self._count = -1
+
+    # left, right and bottom of the occupied slots (None without any)
+    def extents(self):
+        enemies = self.enemies
+        if self._count != enemies.count:
+            n = enemies.count
+            members = enemies.kind[:n] != MEGA
+            if members.any():
+                home_x = enemies.home_x[:n][members]
+                self._extents = (float(home_x.min()), float(home_x.max()),
+                                 float(enemies.home_y[:n][members].max()))
+            else:
+                self._extents = None
+            self._count = n
+        return self._extents
+
+    # Lowest slot's y, or -inf when there is no formation (mega level)
+    def bottom(self):
+        extents = self.extents()
+        return extents[2] + self.offset_y if extents else -np.inf
+
+    # Move the formation one tick (dt in 60 fps frames) and turn at most once
+    def march(self, dt):
+        extents = self.extents()
+        if extents is None:
+            return
+        left, right, _ = extents
+        self.offset_x += self.speed * self.direction * dt
+        if left + self.offset_x <= 0 or right + self.offset_x >= self.max_x:
+            self.direction *= -1
+            self.offset_y += STEP_DOWN
+            self.speed += self.speed_increase
+        self.place()
+
+    # Write slot positions for every attached member
+    def place(self):
+        enemies = self.enemies
+        n = enemies.count
+        attached = ~enemies.diving[:n] & (enemies.kind[:n] != MEGA)
+        enemies.x[:n][attached] = enemies.home_x[:n][attached] + self.offset_x
+        enemies.y[:n][attached] = enemies.home_y[:n][attached] + self.offset_y
+
+    # Current slot position of the given enemies
+    def slot_positions(self, idx):
+        enemies = self.enemies
+        return enemies.home_x[idx] + self.offset_x, enemies.home_y[idx] + self.offset_y
@@ -0,0 +1,445 @@
+import math
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from collision import find_hits
+from entities import EntityStore, NORMAL, BOMBER, ELITE, MEGA
+from formation import Formation
+from scheduler import Scheduler, ticks_until
+
+# Simulation core for Aether Onslaught.
+# Everything in here is plain Python/NumPy with no pygame dependency, so the
+# game rules can run headless and uncapped (bots, balancing runs, regression
+# checks). AetherOnslaught.py draws a GameState and feeds it one Inputs per frame.
+
+WIDTH = 800
+HEIGHT = 600
+
+# Speeds, chances and durations below are per frame at the original 60 fps.
+# GameState rescales them to its own tick rate.
+BASE_TICK_RATE = 60
+
+# Tick rate the game itself runs at
+SIM_RATE = 120
+
+# Sprite sizes double as hitbox sizes
+PLAYER_WIDTH, PLAYER_HEIGHT = 50, 40
+ENEMY_WIDTH, ENEMY_HEIGHT = 40, 30
+BOMBER_WIDTH, BOMBER_HEIGHT = 40, 30
+ELITE_WIDTH, ELITE_HEIGHT = 40, 30
+MEGA_WIDTH, MEGA_HEIGHT = 200, 150
+BULLET_WIDTH, BULLET_HEIGHT = 5, 15
+BOMB_WIDTH, BOMB_HEIGHT = 5, 15
+EXPLOSION_WIDTH, EXPLOSION_HEIGHT = 40, 40
+
+# Player properties
+START_LIVES = 3
+PLAYER_SPEED = 10
+
+# Bullet and bomb properties
+BULLET_SPEED = 7
+BOMB_SPEED = 5
+BOMB_DROP_CHANCE = 0.0025
+
+# Elite dive properties
+DIVE_CHANCE = 0.000625
+DIVE_SPEED = 5
+
+# Mega alien properties
+MEGA_BOMB_CHANCE = 0.01
+MEGA_HEALTH = 20
+
+# Explosion properties
+EXPLOSION_DURATION = 30
+
+# Enemy properties
+BASE_ENEMY_SPEED = 2
+LEVEL_SPEED_STEP = 0.1  # starting speed gained per level
+SPEED_INCREASE = 0.2    # speed gained each time the formation turns
+ENEMY_ROWS = 3
+ENEMY_COLS = 10
+MEGA_LEVEL = 10
+
+# Difficulty knobs a GameState can override (GameState(tuning={...})), in
+# the same per-60-fps-frame units as the constants above
+TUNING = {
+    'bomb_drop_chance': BOMB_DROP_CHANCE,
+    'dive_chance': DIVE_CHANCE,
+    'mega_bomb_chance': MEGA_BOMB_CHANCE,
+    'base_enemy_speed': BASE_ENEMY_SPEED,
+    'level_speed_step': LEVEL_SPEED_STEP,
+    'speed_increase': SPEED_INCREASE,
+}
+
+# Starting slots per entity store, sized from the high-water marks of long
+# autopilot and benchmark runs so a normal game never has to grow a store
+BULLET_POOL = 64
+BOMB_POOL = 128
+EXPLOSION_POOL = 64
+ENEMY_POOL = 64
+
+# One tick of player input. fire/pause/toggle_bombs are key presses that
+# happened this tick, left/right are held keys.
+Inputs = namedtuple('Inputs', ['left', 'right', 'fire', 'pause', 'toggle_bombs'],
+                    defaults=[False, False, False, False, False])
+NO_INPUT = Inputs()
+
+# Per-enemy columns on top of the EntityStore basics
+ENEMY_FIELDS = (
+    ('home_x', np.float32),    # formation slot, relative to the formation offset
+    ('home_y', np.float32),
+    ('diving', np.bool_),
+    ('health', np.int16),
+    ('phase', np.float32),     # mega alien sway angle
+    ('uid', np.int32),         # stable id for scheduled actions (slots move)
+)
+EXPLOSION_FIELDS = (
+    ('uid', np.int32),
+)
+
+# Scheduled action of each enemy kind and the GameState attribute holding
+# its per-tick chance
+ENEMY_ACTIONS = {BOMBER: 'bomb', ELITE: 'dive', MEGA: 'mega_bomb'}
+ACTION_CHANCES = {'bomb': 'bomb_drop_chance', 'dive': 'dive_chance', 'mega_bomb': 'mega_bomb_chance'}
+
+
+def _no_lap(phase):
+    pass
+
+
+class GameState:
+    # seed makes the run reproducible (None picks a fresh one); tick_rate is
+    # how many step() calls make one second of game time; tuning overrides
+    # entries of TUNING
+    def __init__(self, seed=None, tick_rate=BASE_TICK_RATE, tuning=None):
+        unknown = set(tuning or ()) - set(TUNING)
+        if unknown:
+            raise ValueError(f"unknown tuning parameters: {', '.join(sorted(unknown))}")
+        self.tuning = dict(TUNING, **(tuning or {}))
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % (1 << 63))
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.tick_rate = tick_rate
+        self.dt = BASE_TICK_RATE / tick_rate  # 60 fps frames per tick
+        self.player_speed = PLAYER_SPEED * self.dt
+        self.bullet_speed = BULLET_SPEED * self.dt
+        self.bomb_speed = BOMB_SPEED * self.dt
+        self.dive_speed = DIVE_SPEED * self.dt
+        self.explosion_ticks = max(1, round(EXPLOSION_DURATION / self.dt))
+        self.bomb_drop_chance = self._per_tick(self.tuning['bomb_drop_chance'])
+        self.dive_chance = self._per_tick(self.tuning['dive_chance'])
+        self.mega_bomb_chance = self._per_tick(self.tuning['mega_bomb_chance'])
+
+        self.player_x = WIDTH // 2 - PLAYER_WIDTH // 2
+        self.player_y = HEIGHT - 100
+        self.prev_player_x = self.player_x
+        self.lives = START_LIVES
+        self.player_explosion = None
+        self.bullets = EntityStore(BULLET_POOL)
+        self.bombs = EntityStore(BOMB_POOL)
+        self.explosions = EntityStore(EXPLOSION_POOL, EXPLOSION_FIELDS)
+        self.actions = Scheduler()     # next bomb drop / dive per enemy
+        self.expiries = Scheduler()    # explosion end ticks
+        self.next_uid = 1
+        self.enemies = EntityStore(ENEMY_POOL, ENEMY_FIELDS)
+        self.formation = Formation(self.enemies, WIDTH - ENEMY_WIDTH, self.tuning['speed_increase'])
+        self.level = 1
+        self.score = 0
+        self.paused = False
+        self.bombs_enabled = True
+        self.game_over = False
+        self.tick = 0
+        self.profiler = None  # optional profiler.FrameProfiler, gets a lap per phase
+        self.create_enemies(self.level)
+
+    # Chance per tick equivalent to chance per 60 fps frame
+    def _per_tick(self, chance):
+        return 1 - (1 - chance) ** self.dt
+
+    # High-water mark, capacity and grow count of every entity store
+    def pool_stats(self):
+        return {name: getattr(self, name).stats() for name in ('bullets', 'bombs', 'explosions', 'enemies')}
+
+    # Remember where everything was so the renderer can interpolate
+    def _save_previous(self):
+        self.prev_player_x = self.player_x
+        for store in (self.bullets, self.bombs, self.explosions, self.enemies):
+            store.save_previous()
+
+    # Build the formation (or the mega alien) for a level
+    def create_enemies(self, level):
+        self.enemies.clear()
+        if level == MEGA_LEVEL:
+            x = WIDTH // 2 - MEGA_WIDTH // 2
+            y = HEIGHT // 2 - MEGA_HEIGHT // 2  # Mid-screen
+            self.enemies.add(x, y, kind=MEGA, home_x=x, home_y=y, health=MEGA_HEALTH, uid=self._new_uid())
+        else:
+            rows = min(5, ENEMY_ROWS + (level - 1) // 3)
+            for row in range(rows):
+                for col in range(ENEMY_COLS):
+                    if level >= 7 and row == 0:
+                        kind = ELITE
+                    elif level >= 4 and row == 0:
+                        kind = BOMBER
+                    else:
+                        kind = NORMAL
+                    x = 75 + col * (ENEMY_WIDTH + 20)
+                    y = 50 + row * (ENEMY_HEIGHT + 20)
+                    self.enemies.add(x, y, kind=kind, home_x=x, home_y=y, uid=self._new_uid())
+        self.formation.reset(self.tuning['base_enemy_speed'] + (level - 1) * self.tuning['level_speed_step'])
+        self.schedule_enemy_actions()
+
+    def _new_uid(self):
+        uid = self.next_uid
+        self.next_uid += 1
+        return uid
+
+    # Queue the first action of every enemy that has one. Call again after
+    # changing enemy kinds or chances from outside.
+    def schedule_enemy_actions(self):
+        self.actions.clear()
+        enemies = self.enemies
+        n = enemies.count
+        for kind, uid in zip(enemies.kind[:n].tolist(), enemies.uid[:n].tolist()):
+            if kind in ENEMY_ACTIONS:
+                self._schedule_action(ENEMY_ACTIONS[kind], uid)
+
+    def _schedule_action(self, action, uid):
+        delay = ticks_until(self.rng, getattr(self, ACTION_CHANCES[action]))
+        if delay is not None:
+            self.actions.at(self.tick + delay, action, uid)
+
+    def _spawn_explosion(self, x, y, events):
+        uid = self._new_uid()
+        self.explosions.add(x, y, uid=uid)
+        self.expiries.at(self.tick + self.explosion_ticks, 'expire', uid)
+        events.append('explosion')
+
+    def _kill_player(self, events):
+        self.lives -= 1
+        self.player_explosion = {
+            'x': self.player_x,
+            'y': self.player_y,
+            'until': self.tick + self.explosion_ticks
+        }
+        events.append('explosion')
+
+    # Advance the game by one tick. Returns the list of things that happened
+    # ('shoot', 'explosion', 'bomb_drop', 'dive', 'pause', 'unpause',
+    # 'bombs_toggled', 'level_up', 'game_over') so the front end can play
+    # sounds and show screens.
+    def step(self, inputs=NO_INPUT):
+        events = []
+        if self.game_over:
+            return events
+
+        if inputs.pause:
+            self.paused = not self.paused
+            events.append('pause' if self.paused else 'unpause')
+        if inputs.toggle_bombs:
+            self.bombs_enabled = not self.bombs_enabled
+            events.append('bombs_toggled')
+        if self.paused:
+            return events
+
+        self.tick += 1
+        self._save_previous()
+        lap = self.profiler.lap if self.profiler else _no_lap
+
+        if inputs.fire and not self.player_explosion:
+            self.bullets.add(self.player_x + PLAYER_WIDTH // 2 - BULLET_WIDTH // 2,
+                             self.player_y, vy=-self.bullet_speed)
+            events.append('shoot')
+
+        # Player movement
+        if inputs.left and self.player_x > 0 and not self.player_explosion:
+            self.player_x -= self.player_speed
+        if inputs.right and self.player_x < WIDTH - PLAYER_WIDTH and not self.player_explosion:
+            self.player_x += self.player_speed
+        lap('player')
+
+        # Update bullets
+        self.bullets.move()
+        self.bullets.cull(0, HEIGHT)
+        self.bullets.compact()
+        lap('bullets')
+
+        # Update bombs
+        self.bombs.move()
+        self.bombs.cull(-BOMB_HEIGHT, HEIGHT)
+        self.bombs.compact()
+        lap('bombs')
+
+        # Expire explosions whose time is up
+        explosions = self.explosions
+        expired = False
+        for _, uid in self.expiries.due(self.tick):
+            explosions.alive[np.flatnonzero(explosions.uid[:explosions.count] == uid)] = False
+            expired = True
+        if expired:
+            explosions.compact()
+
+        # Update player explosion
+        if self.player_explosion:
+            if self.tick >= self.player_explosion['until']:
+                self.player_explosion = None
+                self.player_x = self.prev_player_x = WIDTH // 2 - PLAYER_WIDTH // 2
+                if self.lives > 0:
+                    self.create_enemies(self.level)
+                    self.bullets.clear()
+                    self.bombs.clear()
+                else:
+                    self.game_over = True
+                    events.append('game_over')
+                    lap('explosions')
+                    return events
+        lap('explosions')
+
+        self._update_enemies(events)
+        lap('enemies')
+        self._apply_hits(events)
+        lap('collisions')
+
+        if not self.enemies.count and not self.player_explosion:
+            self.level += 1
+            self.create_enemies(self.level)
+            self.bullets.clear()
+            self.bombs.clear()
+            events.append('level_up')
+
+        # Game over line: the formation reached the player
+        if not self.player_explosion and self.formation.bottom() > HEIGHT - 100:
+            self._kill_player(events)
+        lap('level')
+
+        return events
+
+    def _drop_bomb(self, x, y, events):
+        self.bombs.add(x, y, vy=self.bomb_speed)
+        events.append('bomb_drop')
+
+    def _update_enemies(self, events):
+        enemies = self.enemies
+        n = enemies.count
+        if not n:
+            return
+        kind = enemies.kind[:n]
+        x = enemies.x[:n]
+        y = enemies.y[:n]
+        diving = enemies.diving[:n]
+
+        # Mega alien sways side to side
+        for i in np.flatnonzero(kind == MEGA).tolist():
+            enemies.phase[i] += 0.05 * self.dt
+            x[i] = WIDTH // 2 + 350 * math.sin(enemies.phase[i]) - MEGA_WIDTH // 2  # Side-to-side, centered
+
+        # Bomb drops and dives that are due. Each enemy's next action is
+        # scheduled as it fires; actions of enemies that died are dropped.
+        for action, uid in self.actions.due(self.tick):
+            slot = np.flatnonzero(enemies.uid[:n] == uid)
+            if not len(slot):
+                continue
+            i = int(slot[0])
+            self._schedule_action(action, uid)
+            if action == 'dive':
+                if not diving[i]:
+                    diving[i] = True
+                    events.append('dive')
+            elif not self.bombs_enabled:
+                pass
+            elif action == 'bomb':
+                self._drop_bomb(x[i] + BOMBER_WIDTH // 2 - BOMB_WIDTH // 2, y[i] + BOMBER_HEIGHT, events)
+            else:
+                self._drop_bomb(x[i] + MEGA_WIDTH // 2 - BOMB_WIDTH // 2, y[i] + MEGA_HEIGHT, events)
+
+        # Divers fall until they leave the screen, then return to their slot
+        divers = np.flatnonzero(diving)
+        if len(divers):
+            y[divers] += self.dive_speed
+            self._return_to_slot(divers[y[divers] > HEIGHT])
+
+        # The rest of the formation marches together and steps down at the edges
+        self.formation.march(self.dt)
+
+    # Re-attach divers at their slot's current position
+    def _return_to_slot(self, idx):
+        enemies = self.enemies
+        enemies.diving[idx] = False
+        x, y = self.formation.slot_positions(idx)
+        enemies.x[idx] = enemies.px[idx] = x
+        enemies.y[idx] = enemies.py[idx] = y
+
+    # Apply every contact collision.find_hits reports for this tick
+    def _apply_hits(self, events):
+        hits = find_hits(self, (ENEMY_WIDTH, ENEMY_HEIGHT), (MEGA_WIDTH, MEGA_HEIGHT),
+                         (PLAYER_WIDTH, PLAYER_HEIGHT))
+        enemies = self.enemies
+        bullets = self.bullets
+
+        for i, e in zip(hits.bullet_hits.tolist(), hits.enemy_hits.tolist()):
+            bullets.alive[i] = False
+            if enemies.kind[e] == MEGA:
+                enemies.health[e] -= 1
+                # Add explosion on hit
+                self._spawn_explosion(bullets.x[i] - EXPLOSION_WIDTH // 2,
+                                      bullets.y[i] - EXPLOSION_HEIGHT // 2, events)
+                if enemies.health[e] <= 0:
+                    self._spawn_explosion(enemies.x[e] + MEGA_WIDTH // 2 - EXPLOSION_WIDTH // 2,
+                                          enemies.y[e] + MEGA_HEIGHT // 2 - EXPLOSION_HEIGHT // 2, events)
+                    enemies.alive[e] = False
+                    self.score += 100
+            else:
+                self._spawn_explosion(enemies.x[e], enemies.y[e], events)
+                enemies.alive[e] = False
+                self.score += 20 if enemies.kind[e] == ELITE else 10
+
+        # Divers that rammed the player go back to their slot
+        if len(hits.diver_hits):
+            self._return_to_slot(hits.diver_hits)
+        if len(hits.bomb_hits):
+            self.bombs.alive[hits.bomb_hits[0]] = False
+        if len(hits.bomb_hits) or len(hits.diver_hits):
+            self._kill_player(events)
+
+        bullets.compact()
+        self.bombs.compact()
+        enemies.compact()
+
+
+# Simple bot: slide under the closest enemy and keep firing
+def autopilot(state):
+    enemies = state.enemies
+    n = enemies.count
+    if not n:
+        return NO_INPUT
+    center = state.player_x + PLAYER_WIDTH // 2
+    widths = np.where(enemies.kind[:n] == MEGA, MEGA_WIDTH, ENEMY_WIDTH)
+    centers = enemies.x[:n] + widths / 2
+    target_x = float(centers[np.argmin(np.abs(centers - center))])
+    return Inputs(left=target_x < center - state.player_speed,
+                  right=target_x > center + state.player_speed,
+                  fire=state.tick % max(1, round(8 / state.dt)) == 0)
+
+
+# Run the simulation with no display and no clock cap
+def run_headless(max_ticks=100000, policy=autopilot, state=None, seed=None):
+    state = state or GameState(seed)
+    while not state.game_over and state.tick < max_ticks:
+        state.step(policy(state))
+    return state
+
+
+if __name__ == "__main__":
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    start = time.perf_counter()
+    final = run_headless(ticks, seed=seed)
+    elapsed = time.perf_counter() - start
+    print(f"{final.tick} ticks in {elapsed:.2f}s ({final.tick / elapsed:.0f} ticks/s), "
+          f"score {final.score}, level {final.level}, lives {final.lives}, seed {final.seed}")
+    for name, stats in final.pool_stats().items():
+        print(f"  {name:<10} high water {stats['high_water']:>5} of {stats['capacity']:>5} slots, grew {stats['grows']}x")
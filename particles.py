@@ -0,0 +1,129 @@
+import numpy as np
+import pygame
+
+from atlas import SpriteAtlas
+
+# Visual particle effects (explosion flashes and sparks).
+# Particles live in fixed-capacity NumPy arrays and are integrated, aged and
+# culled in a few array operations per frame. Each effect is a list of
+# animation frames; every frame is pre-baked at ALPHA_LEVELS opacities and
+# packed into one atlas, so fading needs no per-particle surface work and the
+# whole system draws with a single blits() call. A burst's particles stay
+# next to each other in the arrays, so group_sizes() can hand a dirty-rect
+# renderer one region per burst instead of a rect per spark. At most
+# spawn_budget particles start per frame; bursts beyond that are thinned out.
+# Purely cosmetic: particles use their own RNG and never touch the game state.
+
+ALPHA_LEVELS = 8
+
+
+class ParticleSystem:
+    # animations maps an effect name to its frame surfaces, first to last
+    def __init__(self, animations, capacity=2048, spawn_budget=300, gravity=0.0, seed=None):
+        self.capacity = capacity
+        self.spawn_budget = spawn_budget
+        self.budget = spawn_budget
+        self.gravity = gravity
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+        self.dropped = 0
+        self.bursts = 0
+
+        sprites = {}
+        self.first_frame = {}
+        self.frame_counts = {}
+        frame_index = 0
+        for name, frames in animations.items():
+            self.first_frame[name] = frame_index
+            self.frame_counts[name] = len(frames)
+            for frame in frames:
+                for level in range(ALPHA_LEVELS):
+                    faded = frame.copy()
+                    faded.fill((255, 255, 255, 255 * (level + 1) // ALPHA_LEVELS),
+                               special_flags=pygame.BLEND_RGBA_MULT)
+                    sprites[frame_index * ALPHA_LEVELS + level] = faded
+                frame_index += 1
+        self.atlas = SpriteAtlas(sprites)
+        self.codes = list(range(frame_index * ALPHA_LEVELS))
+        self.half_w = np.array([sprites[code].get_width() / 2 for code in self.codes], np.float32)
+        self.half_h = np.array([sprites[code].get_height() / 2 for code in self.codes], np.float32)
+
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.vx = np.zeros(capacity, np.float32)
+        self.vy = np.zeros(capacity, np.float32)
+        self.age = np.zeros(capacity, np.float32)
+        self.life = np.ones(capacity, np.float32)
+        self.first = np.zeros(capacity, np.int32)
+        self.frames = np.ones(capacity, np.int32)
+        self.burst_id = np.zeros(capacity, np.int32)
+        self.arrays = (self.x, self.y, self.vx, self.vy, self.age, self.life, self.first, self.frames,
+                       self.burst_id)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    # Start count particles of an effect at (x, y), flying out in random
+    # directions at up to speed px/s and living life seconds (+-25%)
+    def burst(self, name, x, y, count=1, speed=0.0, life=0.5):
+        n = min(count, self.budget, self.capacity - self.count)
+        self.dropped += count - n
+        if n <= 0:
+            return
+        self.budget -= n
+        rng = self.rng
+        s = slice(self.count, self.count + n)
+        angle = rng.uniform(0, 2 * np.pi, n)
+        velocity = speed * rng.uniform(0.3, 1.0, n)
+        self.x[s] = x
+        self.y[s] = y
+        self.vx[s] = np.cos(angle) * velocity
+        self.vy[s] = np.sin(angle) * velocity
+        self.age[s] = 0
+        self.life[s] = life * rng.uniform(0.75, 1.25, n)
+        self.first[s] = self.first_frame[name]
+        self.frames[s] = self.frame_counts[name]
+        self.burst_id[s] = self.bursts
+        self.bursts += 1
+        self.count += n
+
+    # Advance every particle by dt seconds and drop the expired ones
+    def update(self, dt):
+        self.budget = self.spawn_budget
+        n = self.count
+        if not n:
+            return
+        self.age[:n] += dt
+        self.vy[:n] += self.gravity * dt
+        self.x[:n] += self.vx[:n] * dt
+        self.y[:n] += self.vy[:n] * dt
+        alive = self.age[:n] < self.life[:n]
+        keep = int(np.count_nonzero(alive))
+        if keep < n:
+            for arr in self.arrays:
+                arr[:keep] = arr[:n][alive]
+            self.count = keep
+
+    # Blit sequence for every live particle, centred on its position
+    def layer(self):
+        n = self.count
+        if not n:
+            return []
+        t = self.age[:n] / self.life[:n]
+        frame = self.first[:n] + np.minimum((t * self.frames[:n]).astype(np.int32), self.frames[:n] - 1)
+        level = np.clip(((1 - t) * ALPHA_LEVELS).astype(np.int32), 0, ALPHA_LEVELS - 1)
+        codes = frame * ALPHA_LEVELS + level
+        x = self.x[:n] - self.half_w[codes]
+        y = self.y[:n] - self.half_h[codes]
+        return self.atlas.mixed_layer(self.codes, codes.tolist(), zip(x.tolist(), y.tolist()))
+
+    # Sizes of the runs of layer() that came from one burst each
+    def group_sizes(self):
+        n = self.count
+        if not n:
+            return []
+        starts = np.flatnonzero(np.diff(self.burst_id[:n])) + 1
+        return np.diff(starts, prepend=0, append=n).tolist()
@@ -0,0 +1,102 @@
+import csv
+import json
+import time
+
+import numpy as np
+
+# Per-phase frame profiler.
+# Code calls begin_frame(), then lap(phase) at the end of each phase, then
+# end_frame(). A lap charges the time since the previous lap to that phase,
+# so timing costs one perf_counter() call per phase. The last `capacity`
+# frames live in a ring buffer and can be exported as CSV or as Chrome
+# trace-event JSON (open in chrome://tracing or Perfetto).
+
+PHASES = ('events', 'player', 'bullets', 'bombs', 'explosions', 'enemies',
+          'collisions', 'level', 'render', 'flip')
+
+
+class FrameProfiler:
+    def __init__(self, phases=PHASES, capacity=600):
+        self.phases = phases
+        self.capacity = capacity
+        self.slot = {name: i for i, name in enumerate(phases)}
+        self.durations = np.zeros((capacity, len(phases)))   # seconds per phase
+        self.offsets = np.zeros((capacity, len(phases)))     # first lap start, from frame start
+        self.frame_start = np.zeros(capacity)
+        self.frame_time = np.zeros(capacity)
+        self.frames = 0
+        self._durations = [0.0] * len(phases)
+        self._offsets = [-1.0] * len(phases)
+        self._start = self._last = time.perf_counter()
+
+    def begin_frame(self):
+        self._durations = [0.0] * len(self.phases)
+        self._offsets = [-1.0] * len(self.phases)
+        self._start = self._last = time.perf_counter()
+
+    # Restart the lap clock without charging anyone (e.g. after a blocking screen)
+    def skip(self):
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        i = self.slot[phase]
+        if self._offsets[i] < 0:
+            self._offsets[i] = self._last - self._start
+        self._durations[i] += now - self._last
+        self._last = now
+
+    def end_frame(self):
+        row = self.frames % self.capacity
+        self.durations[row] = self._durations
+        self.offsets[row] = self._offsets
+        self.frame_start[row] = self._start
+        self.frame_time[row] = time.perf_counter() - self._start
+        self.frames += 1
+
+    # Row indices of the stored frames, oldest first
+    def _rows(self, last=None):
+        count = min(self.frames, self.capacity)
+        if last is not None:
+            count = min(count, last)
+        return (np.arange(self.frames - count, self.frames)) % self.capacity
+
+    # Frame times in ms, oldest first
+    def frame_times_ms(self, last=None):
+        return self.frame_time[self._rows(last)] * 1000
+
+    # Mean ms per phase over the last frames
+    def phase_means_ms(self, last=60):
+        rows = self._rows(last)
+        if not len(rows):
+            return dict.fromkeys(self.phases, 0.0)
+        means = self.durations[rows].mean(axis=0) * 1000
+        return dict(zip(self.phases, means.tolist()))
+
+    def export_csv(self, path):
+        rows = self._rows()
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'start_s', 'frame_ms'] + [f'{p}_ms' for p in self.phases])
+            first = self.frames - len(rows)
+            for n, row in enumerate(rows.tolist()):
+                writer.writerow([first + n, f"{self.frame_start[row]:.6f}", f"{self.frame_time[row] * 1000:.4f}"] +
+                                [f"{d * 1000:.4f}" for d in self.durations[row].tolist()])
+
+    # One complete ("X") event per frame plus one per phase that ran in it.
+    # A phase that ran several times in a frame (several ticks) is drawn from
+    # its first start with its summed duration.
+    def export_chrome_trace(self, path):
+        events = []
+        for row in self._rows().tolist():
+            start_us = self.frame_start[row] * 1e6
+            events.append({'name': 'frame', 'ph': 'X', 'pid': 1, 'tid': 1,
+                           'ts': round(start_us, 1), 'dur': round(self.frame_time[row] * 1e6, 1)})
+            for i, phase in enumerate(self.phases):
+                duration = self.durations[row, i]
+                if duration > 0:
+                    events.append({'name': phase, 'ph': 'X', 'pid': 1, 'tid': 2,
+                                   'ts': round(start_us + self.offsets[row, i] * 1e6, 1),
+                                   'dur': round(duration * 1e6, 1)})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
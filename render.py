@@ -0,0 +1,111 @@
+# Frame presenters for the game screen.
+# Both renderers take the same calls: begin() clears the frame to the
+# background, blit()/blits() draw onto it, present() pushes it to the display
+# (a display.Display: drawing happens on its logical canvas).
+# FullRenderer repaints and flips the whole window like the original loop.
+# DirtyRectRenderer only restores and updates the regions sprites occupied
+# last frame and this frame, and falls back to a full flip when too much of
+# the screen changed for per-rect updates to pay off. Sprites that stay close
+# together (the marching formation, one explosion's particles) are passed to
+# blits() with groups, the sizes of consecutive runs of the sequence that are
+# dirtied as one bounding rect each, so a full screen of enemies counts as a
+# couple of rects rather than dozens. Overlapping rects are merged before the
+# fallback test.
+
+MAX_DIRTY_RECTS = 80
+MAX_DIRTY_AREA = 0.5  # fraction of the screen
+
+
+# Fold each rect into the ones it overlaps when their union is no bigger than
+# the two apart (a sprite's rects from last frame and this one, a bullet over
+# the formation), so the rect count and area tests see the real change
+def _merge(rects):
+    merged = []
+    for rect in rects:
+        for i in reversed(rect.collidelistall(merged)):
+            other = merged[i]
+            union = rect.union(other)
+            if union.w * union.h <= rect.w * rect.h + other.w * other.h:
+                rect = union
+                del merged[i]
+        merged.append(rect)
+    return merged
+
+
+class FullRenderer:
+    def __init__(self, display, background):
+        self.display = display
+        self.screen = display.canvas
+        self.background = background
+
+    def invalidate(self):
+        pass
+
+    def begin(self):
+        self.screen.blit(self.background, (0, 0))
+
+    def blit(self, surface, pos, area=None):
+        return self.screen.blit(surface, pos, area)
+
+    def blits(self, sequence, groups=None):
+        self.screen.blits(sequence, doreturn=False)
+
+    def present(self):
+        self.display.flip()
+
+
+class DirtyRectRenderer:
+    def __init__(self, display, background, max_rects=MAX_DIRTY_RECTS, max_area=MAX_DIRTY_AREA):
+        self.display = display
+        self.screen = screen = display.canvas
+        self.background = background
+        self.max_rects = max_rects
+        self.max_area = max_area * screen.get_width() * screen.get_height()
+        self.screen_rect = screen.get_rect()
+        self.previous = []
+        self.current = []
+        self.full_redraw = True
+        self.full_flips = 0
+        self.partial_updates = 0
+
+    # Something else drew over the screen (pause overlay, transition), so the
+    # next frame has to repaint everything
+    def invalidate(self):
+        self.full_redraw = True
+
+    def begin(self):
+        if self.full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            background = self.background
+            self.screen.blits([(background, rect, rect) for rect in self.previous], doreturn=False)
+        self.current = []
+
+    def blit(self, surface, pos, area=None):
+        rect = self.screen.blit(surface, pos, area)
+        self.current.append(rect)
+        return rect
+
+    def blits(self, sequence, groups=None):
+        rects = self.screen.blits(sequence)
+        if groups is None:
+            self.current.extend(rects)
+            return
+        start = 0
+        for size in groups:
+            if size:
+                self.current.append(rects[start].unionall(rects[start + 1:start + size]))
+            start += size
+
+    def present(self):
+        current = [rect.clip(self.screen_rect) for rect in self.current]
+        dirty = _merge(self.previous + current)
+        self.previous = current
+        if (self.full_redraw or len(dirty) > self.max_rects or
+                sum(r.w * r.h for r in dirty) > self.max_area):
+            self.full_redraw = False
+            self.full_flips += 1
+            self.display.flip()
+        else:
+            self.partial_updates += 1
+            self.display.update(dirty)
@@ -0,0 +1,230 @@
+import struct
+import sys
+import time
+import zlib
+
+from game_state import GameState, Inputs
+
+# Input recording and deterministic replay.
+# A replay is the game seed plus the Inputs fed to every GameState.step()
+# call, run-length encoded, with a state checksum every CHECKSUM_INTERVAL
+# steps so a replay that stops matching the game rules fails at once.
+#
+# File layout (little endian):
+#   header    magic "AORP", version u8, tick rate u16, seed u64, checksum interval u16
+#   runs      u32 count, then per run: varint length, u8 input bits
+#   checksums u32 count, then one u32 CRC per interval
+#   result    u32 steps, u32 final score, u16 final level
+
+MAGIC = b"AORP"
+VERSION = 3  # 2: formation offset replaced per-enemy marching, 3: scheduled enemy actions
+CHECKSUM_INTERVAL = 120
+HEADER = struct.Struct("<4sBHQH")
+RESULT = struct.Struct("<IIH")
+
+LEFT, RIGHT, FIRE, PAUSE, TOGGLE_BOMBS = 1, 2, 4, 8, 16
+
+
+class ReplayError(Exception):
+    pass
+
+
+class ReplayDivergence(ReplayError):
+    def __init__(self, step, expected, actual):
+        super().__init__(f"replay diverged at step {step}: checksum {actual:08x}, expected {expected:08x}")
+        self.step = step
+
+
+def pack_inputs(inputs):
+    return ((LEFT if inputs.left else 0) | (RIGHT if inputs.right else 0) |
+            (FIRE if inputs.fire else 0) | (PAUSE if inputs.pause else 0) |
+            (TOGGLE_BOMBS if inputs.toggle_bombs else 0))
+
+
+def unpack_inputs(bits):
+    return Inputs(bool(bits & LEFT), bool(bits & RIGHT), bool(bits & FIRE),
+                  bool(bits & PAUSE), bool(bits & TOGGLE_BOMBS))
+
+
+# CRC of everything that decides how the game continues
+def state_checksum(state):
+    formation = state.formation
+    crc = zlib.crc32(struct.pack("<ddddiiiiqd??", state.player_x, formation.speed, formation.offset_x,
+                                 formation.offset_y, state.lives, state.score, state.level,
+                                 formation.direction, state.tick,
+                                 float(state.player_explosion['until'] if state.player_explosion else -1),
+                                 state.paused, state.bombs_enabled))
+    for store in (state.bullets, state.bombs, state.enemies):
+        n = store.count
+        crc = zlib.crc32(store.x[:n].tobytes(), crc)
+        crc = zlib.crc32(store.y[:n].tobytes(), crc)
+    return crc
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class Replay:
+    def __init__(self, seed, tick_rate, runs=None, checksums=None, steps=0, score=0, level=1,
+                 checksum_interval=CHECKSUM_INTERVAL):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.runs = runs if runs is not None else []   # [input bits, run length]
+        self.checksums = checksums if checksums is not None else []
+        self.checksum_interval = checksum_interval
+        self.steps = steps
+        self.score = score
+        self.level = level
+
+    def inputs(self):
+        for bits, length in self.runs:
+            inputs = unpack_inputs(bits)
+            for _ in range(length):
+                yield inputs
+
+    def to_bytes(self):
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.tick_rate, self.seed, self.checksum_interval))
+        out += struct.pack("<I", len(self.runs))
+        for bits, length in self.runs:
+            _write_varint(out, length)
+            out.append(bits)
+        out += struct.pack("<I", len(self.checksums))
+        out += struct.pack(f"<{len(self.checksums)}I", *self.checksums)
+        out += RESULT.pack(self.steps, self.score, self.level)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        try:
+            magic, version, tick_rate, seed, interval = HEADER.unpack_from(data, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ReplayError("not an Aether Onslaught replay (or an unsupported version)")
+            pos = HEADER.size
+            (run_count,) = struct.unpack_from("<I", data, pos)
+            pos += 4
+            runs = []
+            for _ in range(run_count):
+                length, pos = _read_varint(data, pos)
+                runs.append([data[pos], length])
+                pos += 1
+            (checksum_count,) = struct.unpack_from("<I", data, pos)
+            pos += 4
+            checksums = list(struct.unpack_from(f"<{checksum_count}I", data, pos))
+            pos += 4 * checksum_count
+            steps, score, level = RESULT.unpack_from(data, pos)
+        except (struct.error, IndexError) as e:
+            raise ReplayError(f"truncated replay: {e}")
+        if not interval:
+            raise ReplayError("replay has a checksum interval of 0")
+        if sum(length for _, length in runs) != steps:
+            raise ReplayError(f"replay inputs cover {sum(length for _, length in runs)} steps, not {steps}")
+        if len(checksums) != steps // interval:
+            raise ReplayError(f"replay has {len(checksums)} checksums for {steps} steps")
+        return cls(seed, tick_rate, runs, checksums, steps, score, level, interval)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+# Wraps GameState.step() and records every call
+class Recorder:
+    def __init__(self, state, checksum_interval=CHECKSUM_INTERVAL):
+        self.state = state
+        self.replay = Replay(state.seed, state.tick_rate, checksum_interval=checksum_interval)
+
+    def step(self, inputs):
+        replay = self.replay
+        bits = pack_inputs(inputs)
+        if replay.runs and replay.runs[-1][0] == bits:
+            replay.runs[-1][1] += 1
+        else:
+            replay.runs.append([bits, 1])
+        events = self.state.step(inputs)
+        replay.steps += 1
+        if replay.steps % replay.checksum_interval == 0:
+            replay.checksums.append(state_checksum(self.state))
+        replay.score = self.state.score
+        replay.level = self.state.level
+        return events
+
+
+# Steps a fresh GameState through a replay, one step per next() call, and
+# raises ReplayDivergence as soon as a checksum disagrees
+class Replayer:
+    def __init__(self, replay):
+        self.replay = replay
+        self.state = GameState(replay.seed, replay.tick_rate)
+        self.steps = 0
+        self._inputs = replay.inputs()
+
+    def done(self):
+        return self.steps >= self.replay.steps
+
+    def step(self):
+        inputs = next(self._inputs)
+        events = self.state.step(inputs)
+        self.steps += 1
+        interval = self.replay.checksum_interval
+        if self.steps % interval == 0:
+            index = self.steps // interval - 1
+            actual = state_checksum(self.state)
+            if index < len(self.replay.checksums) and actual != self.replay.checksums[index]:
+                raise ReplayDivergence(self.steps, self.replay.checksums[index], actual)
+        return events
+
+
+# Re-run a replay headless at full speed; returns the final GameState
+def run_replay(replay):
+    replayer = Replayer(replay)
+    while not replayer.done():
+        replayer.step()
+    return replayer.state
+
+
+# True if the replay reproduces its recorded score (used before a run
+# goes on the high score table)
+def verify(replay):
+    try:
+        state = run_replay(replay)
+    except ReplayError:
+        return False
+    return state.score == replay.score and state.level == replay.level
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python replay.py FILE")
+        sys.exit(2)
+    replay = Replay.load(sys.argv[1])
+    start = time.perf_counter()
+    try:
+        final = run_replay(replay)
+    except ReplayDivergence as e:
+        print(e)
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    ok = final.score == replay.score and final.level == replay.level
+    print(f"{replay.steps} steps in {elapsed:.2f}s ({replay.steps / max(elapsed, 1e-9):.0f} steps/s), "
+          f"score {final.score} (recorded {replay.score}), level {final.level}: {'OK' if ok else 'MISMATCH'}")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,155 @@
+import time
+
+import pygame
+
+# Scene stack and the one main loop that drives every screen.
+# The loop hands each event to the top scene's handle(), calls update(dt)
+# once per frame and then draw(). Scenes change the stack through their
+# manager: push() an overlay (the scene below gets pause(), and resume()
+# when it is popped again), pop() back, or replace() the current scene.
+# Nothing else blocks, so the window keeps servicing its event queue during
+# timed screens too.
+#
+# A scene with idle = True has nothing moving on its own. For those the loop
+# sleeps in pygame.event.wait() until an event arrives or the scene's next
+# wake-up (wake_ms()), and only calls draw() when the scene set dirty, so a
+# menu left alone costs a few wake-ups per second instead of a CPU core.
+# Background services that must keep answering whatever screen is up (the
+# spectator stream accepting viewers) register with add_poller(): they are
+# called on every pass, and idle scenes wake at least every POLL_MS for them.
+
+POLL_MS = 250
+
+
+class Scene:
+    idle = False
+
+    def __init__(self):
+        self.manager = None
+        self.dirty = True
+
+    def enter(self):
+        pass
+
+    def exit(self):
+        pass
+
+    # Start of a pass through the main loop, before its events
+    def begin_frame(self):
+        pass
+
+    # Another scene was pushed on top / popped off again
+    def pause(self):
+        pass
+
+    def resume(self):
+        pass
+
+    def handle(self, event):
+        if event.type == pygame.QUIT:
+            self.manager.quit()
+
+    def update(self, dt):
+        pass
+
+    def draw(self):
+        pass
+
+    # Idle scenes: ms until update() has something to do (None = only on events)
+    def wake_ms(self):
+        return None
+
+
+# Idle scene that calls finish() once it has been up for duration seconds
+class TimedScene(Scene):
+    idle = True
+
+    def __init__(self, duration):
+        super().__init__()
+        self.duration = duration
+        self.elapsed = 0.0
+
+    def update(self, dt):
+        self.elapsed += dt
+        if self.elapsed >= self.duration:
+            self.finish()
+
+    def wake_ms(self):
+        return max(1, int((self.duration - self.elapsed) * 1000))
+
+    def finish(self):
+        self.manager.pop()
+
+
+class SceneManager:
+    def __init__(self, fps=60):
+        self.fps = fps
+        self.stack = []
+        self.running = True
+        self.pollers = []
+        self.clock = pygame.time.Clock()
+
+    @property
+    def top(self):
+        return self.stack[-1] if self.stack else None
+
+    def push(self, scene):
+        if self.stack:
+            self.stack[-1].pause()
+        scene.manager = self
+        self.stack.append(scene)
+        scene.enter()
+
+    def pop(self):
+        scene = self.stack.pop()
+        scene.exit()
+        if self.stack:
+            self.stack[-1].resume()
+        return scene
+
+    def replace(self, scene):
+        self.stack.pop().exit()
+        scene.manager = self
+        self.stack.append(scene)
+        scene.enter()
+
+    def quit(self):
+        self.running = False
+
+    # Call poll() once per pass through the loop
+    def add_poller(self, poll):
+        self.pollers.append(poll)
+
+    def _events(self, scene):
+        wake = scene.wake_ms() if scene.idle and not scene.dirty else 0
+        if self.pollers and (wake is None or wake > POLL_MS):
+            wake = POLL_MS
+        if wake is not None and wake <= 0:
+            return pygame.event.get()
+        # event.wait(0) waits forever
+        return [pygame.event.wait(wake or 0)] + pygame.event.get()
+
+    def run(self):
+        last_time = time.perf_counter()
+        while self.running and self.stack:
+            for poll in self.pollers:
+                poll()
+            self.top.begin_frame()
+            for event in self._events(self.top):
+                if event.type != pygame.NOEVENT and self.running and self.stack:
+                    self.top.handle(event)
+            if not self.running or not self.stack:
+                break
+            now = time.perf_counter()
+            dt = now - last_time
+            last_time = now
+            scene = self.top
+            scene.update(dt)
+            if scene is not self.top:
+                continue  # update switched scenes; the new one draws next pass
+            if not scene.idle:
+                scene.draw()
+                self.clock.tick(self.fps)
+            elif scene.dirty:
+                scene.dirty = False
+                scene.draw()
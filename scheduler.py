@@ -0,0 +1,40 @@
+import heapq
+
+# Deadline queue for game events.
+# Instead of rolling a chance for every enemy every tick, the game samples
+# when each enemy will next act and queues (tick, action, uid) entries here;
+# timed things such as explosions are queued at their expiry tick. Each tick
+# then only touches the entries that are due. Entries are never cancelled:
+# whoever pops one checks that its entity still exists.
+
+
+class Scheduler:
+    def __init__(self):
+        self.heap = []
+        self.seq = 0  # keeps same-tick entries in scheduling order
+
+    def __len__(self):
+        return len(self.heap)
+
+    def clear(self):
+        self.heap.clear()
+
+    def at(self, tick, action, uid):
+        heapq.heappush(self.heap, (tick, self.seq, action, uid))
+        self.seq += 1
+
+    # Pop every (action, uid) due by tick, in order. Entries scheduled while
+    # iterating are picked up too if they are already due.
+    def due(self, tick):
+        heap = self.heap
+        while heap and heap[0][0] <= tick:
+            _, _, action, uid = heapq.heappop(heap)
+            yield action, uid
+
+
+# Ticks until the first success of a per-tick chance (at least 1), i.e. the
+# same distribution as rolling the chance every tick. None if it never happens.
+def ticks_until(rng, chance):
+    if chance <= 0:
+        return None
+    return int(rng.geometric(min(chance, 1.0)))
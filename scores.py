@@ -0,0 +1,175 @@
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+# High score store.
+# Every submitted score is kept in a local SQLite database (full history,
+# indexed by mode and score for top-N queries). The tables the screens show
+# are cached in memory and updated as soon as a score is submitted; the
+# INSERT itself runs on a background writer thread with its own connection,
+# so the game never waits on a slow disk. Other file writes that belong with
+# a score (its replay) can be queued on the same thread with defer(). Each
+# write is one transaction, so a crash leaves either the whole row or
+# nothing. The old high_scores.json table is imported the first time the
+# database is opened.
+
+DEFAULT_MODE = "arcade"
+TABLE_SIZE = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    mode TEXT NOT NULL,
+    initials TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER,
+    seed INTEGER,
+    replay TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_mode ON scores (mode, score DESC);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _connect(path):
+    # An in-memory fallback database is shared with the writer thread
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ScoreStore:
+    def __init__(self, path, legacy_json=None, log=print):
+        self.path = path
+        self.log = log
+        self.tables = {}
+        self.queue = queue.Queue()
+        try:
+            conn = _connect(path)
+            with conn:
+                conn.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            # Keep the game playable; scores just won't outlive the session
+            log(f"Could not open score database {path}: {e}")
+            self.path = path = ":memory:"
+            conn = _connect(path)
+            with conn:
+                conn.executescript(SCHEMA)
+        if legacy_json:
+            self._import_json(conn, legacy_json)
+        self.conn = conn if path == ":memory:" else None
+        if self.conn is None:
+            conn.close()
+        self.thread = threading.Thread(target=self._run, name="score-writer", daemon=True)
+        self.thread.start()
+
+    # One-time import of the old JSON top five
+    def _import_json(self, conn, json_path):
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'imported_json'").fetchone():
+            return
+        try:
+            with open(json_path) as f:
+                entries = json.load(f)
+            rows = [(DEFAULT_MODE, str(e['initials']), int(e['score']), os.path.getmtime(json_path))
+                    for e in entries]
+        except FileNotFoundError:
+            rows = []
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            # Leave the file alone and try again next start rather than
+            # pretending it was empty
+            self.log(f"Could not import {json_path}: {e}")
+            return
+        with conn:
+            conn.executemany("INSERT INTO scores (mode, initials, score, created) VALUES (?, ?, ?, ?)", rows)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('imported_json', ?)", (str(len(rows)),))
+        if rows:
+            self.log(f"Imported {len(rows)} high scores from {json_path}")
+
+    def _query(self, sql, args=()):
+        if self.conn is not None:
+            return self.conn.execute(sql, args).fetchall()
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            return conn.execute(sql, args).fetchall()
+        finally:
+            conn.close()
+
+    def _fetch_top(self, mode, n):
+        rows = self._query("SELECT initials, score FROM scores WHERE mode = ? ORDER BY score DESC, id LIMIT ?",
+                           (mode, n))
+        return [{"initials": initials, "score": score} for initials, score in rows]
+
+    # Best scores for a mode as [{"initials", "score"}], highest first.
+    # Tables up to TABLE_SIZE come from the cache.
+    def top(self, mode=DEFAULT_MODE, n=TABLE_SIZE):
+        if n > TABLE_SIZE:
+            return self._fetch_top(mode, n)
+        if mode not in self.tables:
+            self.tables[mode] = self._fetch_top(mode, TABLE_SIZE)
+        return self.tables[mode][:n]
+
+    # True if the score would make the mode's table
+    def qualifies(self, score, mode=DEFAULT_MODE, n=TABLE_SIZE):
+        table = self.top(mode, n)
+        return len(table) < n or score > table[-1]["score"]
+
+    # Record a score. The cached table updates now, the database write is queued.
+    def submit(self, initials, score, mode=DEFAULT_MODE, level=None, seed=None, replay=None):
+        self.top(mode)
+        table = self.tables[mode]
+        table.append({"initials": initials, "score": score})
+        table.sort(key=lambda entry: entry["score"], reverse=True)
+        del table[TABLE_SIZE:]
+        self.queue.put((mode, initials, score, level, seed, replay, time.time()))
+
+    # Run job() on the writer thread, after the writes queued before it
+    def defer(self, job):
+        self.queue.put(job)
+
+    def _run(self):
+        conn = self.conn
+        if conn is None:
+            conn = _connect(self.path)
+        while True:
+            row = self.queue.get()
+            if row is None:
+                break
+            if callable(row):
+                try:
+                    row()
+                except Exception as e:
+                    self.log(f"Background write failed: {e}")
+                finally:
+                    self.queue.task_done()
+                continue
+            try:
+                with conn:
+                    conn.execute("INSERT INTO scores (mode, initials, score, level, seed, replay, created) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+            except sqlite3.Error as e:
+                self.log(f"Could not save score {row[1]} {row[2]}: {e}")
+            finally:
+                self.queue.task_done()
+        if conn is not self.conn:
+            conn.close()
+
+    # Finish pending writes and stop the writer
+    def close(self, timeout=5.0):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+
+if __name__ == "__main__":
+    store = ScoreStore(sys.argv[1] if len(sys.argv) > 1 else "high_scores.db")
+    for mode, count in store._query("SELECT mode, COUNT(*) FROM scores GROUP BY mode ORDER BY mode"):
+        print(f"{mode}: {count} scores")
+        for entry in store.top(mode, 10):
+            print(f"  {entry['initials']:<4} {entry['score']:>8}")
+    store.close()
@@ -0,0 +1,282 @@
+import struct
+import sys
+import time
+import zlib
+from collections import deque
+
+import numpy as np
+
+from game_state import GameState, autopilot
+
+# Binary snapshots of a running GameState, and a rewind buffer built on them.
+# A snapshot holds everything that decides how the game continues: player,
+# lives, score, level, formation, every entity store (including the enemies'
+# mega alien health and sway phase), both schedulers, the uid counter and the
+# RNG state, so a restored game plays on exactly as the original would have.
+# Constructor settings (tick rate, tuning) are not part of it: restore into a
+# GameState built with the same ones. Stores are written as their live slots
+# only, field by field, so a level 1 snapshot is about 2 KB.
+#
+# Layout (little endian):
+#   header     magic "AOSS", version u8, tick rate u16, seed u64, tick i64
+#   game       player x/y/previous x f64, lives, score, level i32, next uid i64,
+#              paused, bombs enabled, game over u8
+#   explosion  present u8, x/y f64, until i64
+#   formation  offset x/y, speed f64, direction i32
+#   rng        PCG64 state and increment (u128 each), has_uint32 u8, uinteger u32
+#   schedulers per scheduler: seq i64, u32 count, then ticks i64[count],
+#              seqs i64[count], actions u8[count], uids i32[count]
+#   stores     per store: u32 count, then each field's first count values
+#
+# RewindBuffer keeps the last few seconds of snapshots: every
+# keyframe_interval-th one is stored whole, the rest as the XOR with the one
+# before. Consecutive ticks differ in a few bytes, so the XOR is mostly zero
+# bytes and zlib shrinks it to a few hundred bytes.
+
+MAGIC = b"AOSS"
+VERSION = 2
+HEADER = struct.Struct("<4sBHQq")
+GAME = struct.Struct("<dddiiiq???")
+EXPLOSION = struct.Struct("<?ddq")
+FORMATION = struct.Struct("<dddi")
+RNG = struct.Struct("<16s16sBI")
+SCHEDULER = struct.Struct("<qI")
+COUNT = struct.Struct("<I")
+
+STORES = ('bullets', 'bombs', 'explosions', 'enemies')
+SCHEDULERS = ('actions', 'expiries')
+ACTIONS = ('bomb', 'dive', 'mega_bomb', 'expire')  # scheduler action codes
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _pack_u128(value):
+    return value.to_bytes(16, 'little')
+
+
+def _unpack_u128(data):
+    return int.from_bytes(data, 'little')
+
+
+def snapshot(state):
+    parts = [HEADER.pack(MAGIC, VERSION, state.tick_rate, state.seed, state.tick)]
+    parts.append(GAME.pack(state.player_x, state.player_y, state.prev_player_x, state.lives,
+                           state.score, state.level, state.next_uid, state.paused,
+                           state.bombs_enabled, state.game_over))
+    explosion = state.player_explosion
+    if explosion:
+        parts.append(EXPLOSION.pack(True, explosion['x'], explosion['y'], explosion['until']))
+    else:
+        parts.append(EXPLOSION.pack(False, 0.0, 0.0, 0))
+    formation = state.formation
+    parts.append(FORMATION.pack(formation.offset_x, formation.offset_y, formation.speed,
+                                formation.direction))
+
+    rng = state.rng.bit_generator.state
+    if rng['bit_generator'] != 'PCG64':
+        raise SnapshotError(f"can't snapshot a {rng['bit_generator']} generator")
+    parts.append(RNG.pack(_pack_u128(rng['state']['state']), _pack_u128(rng['state']['inc']),
+                          rng['has_uint32'], rng['uinteger']))
+
+    for name in SCHEDULERS:
+        scheduler = getattr(state, name)
+        heap = scheduler.heap
+        parts.append(SCHEDULER.pack(scheduler.seq, len(heap)))
+        if heap:
+            ticks, seqs, actions, uids = zip(*heap)
+            parts.append(np.array(ticks, np.int64).tobytes())
+            parts.append(np.array(seqs, np.int64).tobytes())
+            parts.append(bytes(ACTION_CODES[action] for action in actions))
+            parts.append(np.array(uids, np.int32).tobytes())
+
+    for name in STORES:
+        store = getattr(state, name)
+        n = store.count
+        parts.append(COUNT.pack(n))
+        for field, _ in store.fields:
+            parts.append(getattr(store, field)[:n].tobytes())
+    return b"".join(parts)
+
+
+# Put a snapshot back into state, which must have been built with the same
+# tick rate (and tuning) as the one it was taken from
+def restore(state, data):
+    try:
+        magic, version, tick_rate, seed, tick = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise SnapshotError("not an Aether Onslaught snapshot (or an unsupported version)")
+        if tick_rate != state.tick_rate:
+            raise SnapshotError(f"snapshot runs at {tick_rate} ticks/s, the game at {state.tick_rate}")
+        pos = HEADER.size
+        (player_x, player_y, prev_player_x, lives, score, level, next_uid,
+         paused, bombs_enabled, game_over) = GAME.unpack_from(data, pos)
+        pos += GAME.size
+        exploding, explosion_x, explosion_y, until = EXPLOSION.unpack_from(data, pos)
+        pos += EXPLOSION.size
+        offset_x, offset_y, speed, direction = FORMATION.unpack_from(data, pos)
+        pos += FORMATION.size
+        rng_state, rng_inc, has_uint32, uinteger = RNG.unpack_from(data, pos)
+        pos += RNG.size
+
+        heaps = []
+        for _ in SCHEDULERS:
+            seq, count = SCHEDULER.unpack_from(data, pos)
+            pos += SCHEDULER.size
+            ticks = np.frombuffer(data, np.int64, count, pos).tolist()
+            pos += 8 * count
+            seqs = np.frombuffer(data, np.int64, count, pos).tolist()
+            pos += 8 * count
+            actions = [ACTIONS[code] for code in data[pos:pos + count]]
+            pos += count
+            uids = np.frombuffer(data, np.int32, count, pos).tolist()
+            pos += 4 * count
+            heaps.append((seq, list(zip(ticks, seqs, actions, uids))))
+
+        columns = []
+        for name in STORES:
+            store = getattr(state, name)
+            (n,) = COUNT.unpack_from(data, pos)
+            pos += COUNT.size
+            fields = []
+            for field, dtype in store.fields:
+                fields.append((field, np.frombuffer(data, dtype, n, pos)))
+                pos += n * np.dtype(dtype).itemsize
+            columns.append((store, n, fields))
+    except (struct.error, ValueError, IndexError) as e:
+        raise SnapshotError(f"truncated snapshot: {e}")
+
+    # Everything parsed; only now touch the state
+    state.seed = seed
+    state.tick = tick
+    state.player_x, state.player_y, state.prev_player_x = player_x, player_y, prev_player_x
+    state.lives, state.score, state.level, state.next_uid = lives, score, level, next_uid
+    state.paused, state.bombs_enabled, state.game_over = paused, bombs_enabled, game_over
+    state.player_explosion = {'x': explosion_x, 'y': explosion_y, 'until': until} if exploding else None
+    state.rng.bit_generator.state = {
+        'bit_generator': 'PCG64',
+        'state': {'state': _unpack_u128(rng_state), 'inc': _unpack_u128(rng_inc)},
+        'has_uint32': has_uint32,
+        'uinteger': uinteger,
+    }
+    for name, (seq, heap) in zip(SCHEDULERS, heaps):
+        scheduler = getattr(state, name)
+        scheduler.heap[:] = heap  # saved in heap order
+        scheduler.seq = seq
+    for store, n, fields in columns:
+        store.reserve(n)
+        store.alive[n:store.count] = False
+        for field, values in fields:
+            getattr(store, field)[:n] = values
+        store.count = n
+        store.high_water = max(store.high_water, n)
+    formation = state.formation
+    formation.offset_x, formation.offset_y = offset_x, offset_y
+    formation.speed, formation.direction = speed, direction
+    formation.invalidate()
+
+
+# New GameState from a snapshot; tuning must match the original game's
+def from_snapshot(data, tuning=None):
+    try:
+        _, _, tick_rate, seed, _ = HEADER.unpack_from(data, 0)
+    except struct.error as e:
+        raise SnapshotError(f"truncated snapshot: {e}")
+    state = GameState(seed, tick_rate, tuning)
+    restore(state, data)
+    return state
+
+
+def _xor(a, b):
+    size = max(len(a), len(b))
+    x = np.zeros(size, np.uint8)
+    x[:len(a)] = np.frombuffer(a, np.uint8)
+    x[:len(b)] ^= np.frombuffer(b, np.uint8)
+    return x.tobytes()
+
+
+# Last `capacity` snapshots, one push() per tick. Frames are grouped behind
+# their keyframe so the oldest group can be dropped as a whole; memory stays
+# bounded by capacity + keyframe_interval compressed frames.
+class RewindBuffer:
+    def __init__(self, capacity=600, keyframe_interval=60, level=1):
+        self.capacity = capacity
+        self.keyframe_interval = keyframe_interval
+        self.level = level  # zlib level: 1 is plenty for mostly-zero deltas
+        self.groups = deque()   # [keyframe, delta, delta, ...], frames are (length, zlib data)
+        self.count = 0
+        self.last = None        # newest snapshot, uncompressed
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.groups.clear()
+        self.count = 0
+        self.last = None
+
+    # Compressed bytes held
+    def nbytes(self):
+        return sum(len(data) for group in self.groups for _, data in group)
+
+    def push(self, state):
+        data = snapshot(state)
+        if self.last is None or len(self.groups[-1]) >= self.keyframe_interval:
+            self.groups.append([(len(data), zlib.compress(data, self.level))])
+        else:
+            self.groups[-1].append((len(data), zlib.compress(_xor(data, self.last), self.level)))
+        self.last = data
+        self.count += 1
+        while self.count - len(self.groups[0]) >= self.capacity:
+            self.count -= len(self.groups.popleft())
+
+    # Snapshot from `back` pushes ago (0 = the newest; clamped to the oldest
+    # one held). Everything newer is dropped, so pushing carries on from it.
+    def rewind(self, back):
+        if not self.count:
+            raise SnapshotError("nothing to rewind to")
+        index = max(0, self.count - 1 - back)
+        for group in self.groups:
+            if index < len(group):
+                break
+            index -= len(group)
+        length, packed = group[0]
+        data = zlib.decompress(packed)
+        for length, packed in group[1:index + 1]:
+            data = _xor(data, zlib.decompress(packed))[:length]
+        # Drop the newer frames
+        del group[index + 1:]
+        while self.groups[-1] is not group:
+            self.groups.pop()
+        self.count = sum(len(g) for g in self.groups)
+        self.last = data
+        return data
+
+
+if __name__ == "__main__":
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    state = GameState(seed, 120)
+    buffer = RewindBuffer()
+    snapshot_time = push_time = 0.0
+    size = 0
+    for _ in range(ticks):
+        if state.game_over:
+            break
+        state.step(autopilot(state))
+        start = time.perf_counter()
+        data = snapshot(state)
+        snapshot_time += time.perf_counter() - start
+        size = max(size, len(data))
+        start = time.perf_counter()
+        buffer.push(state)
+        push_time += time.perf_counter() - start
+    steps = state.tick
+    print(f"{steps} ticks: snapshot {snapshot_time / steps * 1e6:.0f} us, "
+          f"rewind push {push_time / steps * 1e6:.0f} us per tick, largest snapshot {size} bytes")
+    print(f"rewind buffer: {len(buffer)} frames in {buffer.nbytes() / 1024:.0f} KB")
+    start = time.perf_counter()
+    rewound = from_snapshot(buffer.rewind(len(buffer)))
+    print(f"rewound {steps - rewound.tick} ticks in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,381 @@
+import os
+import socket
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+# Live spectator stream: a game publishes what is on screen to viewers on
+# localhost TCP ("127.0.0.1:7420", or just a port) or a UNIX domain socket
+# ("unix:/tmp/aether.sock"). It sends game state, not video.
+#
+# Stream (little endian): a hello (magic "AOSP", version u8, frames per
+# second u16), then messages of u32 payload size, u8 kind, u32 sequence
+# number and a zlib payload. The payload is one frame as int16 sections:
+#   head     tick, score, level, lives, player x/y, player explosion flag/x/y
+#            and the four store counts, as int32 pairs
+#   stores   x and y of every bullet, bomb, explosion and enemy, rounded to
+#            pixels; enemy kinds; explosion uids (int32 pairs)
+# A keyframe carries the sections as they are. A delta carries each section
+# minus the same section of the previous frame, when its length is unchanged
+# (the head always is). Formation marches and straight-flying shots become
+# runs of equal small numbers, which zlib squeezes to a few bytes, so a 60 Hz
+# stream stays around 1.5 to 4 KB/s, mega alien fights included. Keyframes
+# go out every keyframe_interval frames and whenever a viewer joins.
+#
+# Sends never block the game: each viewer has an outgoing buffer that is
+# flushed with non-blocking send(), and a viewer that falls more than
+# max_backlog bytes behind is disconnected. Viewers are accepted by poll(),
+# which the game calls on every screen, so one can join on the title screen
+# and gets frames once play (or a replay) starts.
+#
+# python spectator.py [ADDRESS]   watch a game started with --spectate
+# python spectator.py --bandwidth measure the stream for the bench scenarios
+
+MAGIC = b"AOSP"
+VERSION = 1
+HELLO = struct.Struct("<4sBH")
+MESSAGE = struct.Struct("<IBI")
+KEYFRAME, DELTA = 1, 2
+
+DEFAULT_ADDRESS = "127.0.0.1:7420"
+SEND_EVERY = 2            # ticks per frame: 60 Hz at the game's 120 ticks/s
+KEYFRAME_INTERVAL = 60    # frames
+MAX_BACKLOG = 64 * 1024   # bytes
+HEAD_FIELDS = 13
+STORES = ('bullets', 'bombs', 'explosions', 'enemies')
+
+
+class StreamError(Exception):
+    pass
+
+
+# "unix:PATH", "HOST:PORT" or "PORT" -> (family, socket address)
+def parse_address(text):
+    if text.startswith("unix:"):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise StreamError("UNIX domain sockets are not available here")
+        return socket.AF_UNIX, text[5:]
+    host, _, port = text.rpartition(":")
+    try:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    except ValueError:
+        raise StreamError(f"bad spectator address {text!r}")
+
+
+def _int32s(values):
+    return np.array(values, np.int32).view(np.int16)  # a copy: frames outlive the tick
+
+
+# Sections of one frame, in stream order
+def encode_frame(state):
+    explosion = state.player_explosion
+    counts = [getattr(state, name).count for name in STORES]
+    sections = [_int32s([state.tick, state.score, state.level, state.lives,
+                         round(state.player_x), round(state.player_y), bool(explosion),
+                         round(explosion['x']) if explosion else 0,
+                         round(explosion['y']) if explosion else 0] + counts)]
+    for name in STORES:
+        store = getattr(state, name)
+        n = store.count
+        sections.append(np.rint(store.x[:n]).astype(np.int16))
+        sections.append(np.rint(store.y[:n]).astype(np.int16))
+    enemies = state.enemies
+    sections.append(enemies.kind[:enemies.count].astype(np.int16))
+    explosions = state.explosions
+    sections.append(_int32s(explosions.uid[:explosions.count]))
+    return sections
+
+
+def _section_sizes(head):
+    counts = head.view(np.int32)[HEAD_FIELDS - 4:].tolist()
+    sizes = []
+    for n in counts:
+        sizes += [n, n]
+    return sizes + [counts[3], 2 * counts[2]]
+
+
+# Payload bytes for sections, as deltas against prev when given
+def pack_frame(sections, prev=None):
+    if prev is not None:
+        sections = [cur - old if len(cur) == len(old) else cur for cur, old in zip(sections, prev)]
+    return np.concatenate(sections).tobytes()
+
+
+def unpack_frame(data, prev=None):
+    values = np.frombuffer(data, np.int16)
+    head = values[:2 * HEAD_FIELDS]
+    if prev is not None:
+        head = head + prev[0]
+    sections = [head]
+    pos = len(head)
+    for i, size in enumerate(_section_sizes(head), 1):
+        section = values[pos:pos + size]
+        if len(section) != size:
+            raise StreamError("truncated frame")
+        pos += size
+        if prev is not None and len(prev[i]) == size:
+            section = section + prev[i]
+        sections.append(section)
+    return sections
+
+
+# Show a decoded frame through a GameState, so draw_game() can draw it
+def apply_frame(state, sections):
+    head = sections[0].view(np.int32).tolist()
+    (state.tick, state.score, state.level, state.lives, player_x, player_y,
+     exploding, explosion_x, explosion_y) = head[:HEAD_FIELDS - 4]
+    state.player_x = state.prev_player_x = player_x
+    state.player_y = player_y
+    state.player_explosion = {'x': explosion_x, 'y': explosion_y, 'until': 0} if exploding else None
+    for i, name in enumerate(STORES):
+        store = getattr(state, name)
+        x, y = sections[1 + 2 * i], sections[2 + 2 * i]
+        n = len(x)
+        store.reserve(n)
+        store.x[:n] = store.px[:n] = x
+        store.y[:n] = store.py[:n] = y
+        store.alive[:n] = True
+        store.alive[n:store.count] = False
+        store.count = n
+    state.enemies.kind[:state.enemies.count] = sections[-2]
+    state.explosions.uid[:state.explosions.count] = sections[-1].view(np.int32)
+
+
+class Publisher:
+    def __init__(self, address, tick_rate, send_every=SEND_EVERY, keyframe_interval=KEYFRAME_INTERVAL,
+                 max_backlog=MAX_BACKLOG, log=print):
+        self.family, self.address = parse_address(address)
+        self.send_every = send_every
+        self.keyframe_interval = keyframe_interval
+        self.max_backlog = max_backlog
+        self.log = log
+        self.hello = HELLO.pack(MAGIC, VERSION, round(tick_rate / send_every))
+        self.clients = []   # [socket, outgoing bytes]
+        self.ticks = 0
+        self.seq = 0
+        self.prev = None
+        self.bytes_sent = 0
+        self.server = socket.socket(self.family, socket.SOCK_STREAM)
+        try:
+            if self.family == socket.AF_UNIX:
+                if os.path.exists(self.address):
+                    os.unlink(self.address)  # left over from an earlier run
+            else:
+                self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server.bind(self.address)
+            self.server.listen()
+            self.server.setblocking(False)
+        except OSError:
+            self.server.close()
+            raise
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            client.setblocking(False)
+            if self.family != socket.AF_UNIX:
+                client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.clients.append([client, bytearray(self.hello)])
+            self.prev = None  # newcomers start from a keyframe
+            self.log(f"Spectator joined ({len(self.clients)} watching)")
+
+    def _drop(self, client, reason):
+        self.clients.remove(client)
+        client[0].close()
+        self.log(f"Spectator dropped: {reason} ({len(self.clients)} watching)")
+
+    def _flush(self, client):
+        sock, pending = client
+        try:
+            sent = sock.send(pending)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError as e:
+            self._drop(client, e.strerror or e)
+            return
+        del pending[:sent]
+        self.bytes_sent += sent
+        if len(pending) > self.max_backlog:
+            self._drop(client, "too slow")
+
+    # Accept new viewers and keep flushing what is queued for them; call this
+    # on every pass of the main loop, so viewers get their hello on any screen
+    def poll(self):
+        self._accept()
+        for client in list(self.clients):
+            if client[1]:
+                self._flush(client)
+
+    # Call once per game tick; every send_every-th tick goes out as a frame
+    def tick(self, state):
+        self.ticks += 1
+        if self.ticks % self.send_every:
+            return
+        self._accept()
+        if not self.clients:
+            self.prev = None
+            return
+        sections = encode_frame(state)
+        if self.prev is None or self.seq % self.keyframe_interval == 0:
+            kind, payload = KEYFRAME, pack_frame(sections)
+        else:
+            kind, payload = DELTA, pack_frame(sections, self.prev)
+        self.prev = sections
+        payload = zlib.compress(payload)
+        message = MESSAGE.pack(len(payload), kind, self.seq) + payload
+        self.seq += 1
+        for client in list(self.clients):
+            client[1] += message
+            self._flush(client)
+
+    def close(self):
+        for sock, _ in self.clients:
+            sock.close()
+        self.clients.clear()
+        self.server.close()
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+# Viewer end: poll() reads whatever arrived and returns the newest frame
+class Subscriber:
+    def __init__(self, address, timeout=5.0):
+        family, address = parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(address)
+            magic, version, self.fps = HELLO.unpack(self._read_exactly(HELLO.size))
+        except OSError:
+            self.sock.close()
+            raise
+        if magic != MAGIC or version != VERSION:
+            self.sock.close()
+            raise StreamError("not an Aether Onslaught spectator stream (or an unsupported version)")
+        self.sock.setblocking(False)
+        self.buffer = bytearray()
+        self.prev = None
+        self.seq = None
+        self.bytes_received = HELLO.size
+
+    def _read_exactly(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise StreamError("stream closed")
+            data += chunk
+        return data
+
+    def poll(self):
+        while True:
+            try:
+                chunk = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            if not chunk:
+                raise StreamError("stream closed")
+            self.buffer += chunk
+            self.bytes_received += len(chunk)
+        latest = None
+        buffer = self.buffer
+        pos = 0
+        while len(buffer) - pos >= MESSAGE.size:
+            size, kind, seq = MESSAGE.unpack_from(buffer, pos)
+            end = pos + MESSAGE.size + size
+            if len(buffer) < end:
+                break
+            data = zlib.decompress(buffer[pos + MESSAGE.size:end])
+            pos = end
+            if kind == KEYFRAME:
+                self.prev = unpack_frame(data)
+            elif self.prev is not None and seq == self.seq + 1:
+                self.prev = unpack_frame(data, self.prev)
+            else:
+                self.prev = None  # lost track; wait for the next keyframe
+                continue
+            self.seq = seq
+            latest = self.prev
+        del buffer[:pos]
+        return latest
+
+    def close(self):
+        self.sock.close()
+
+
+# Watch a game in a window, drawn with the game's own sprites
+def watch(address):
+    import pygame
+    import AetherOnslaught as game
+    from game_state import GameState
+    from render import FullRenderer
+
+    try:
+        subscriber = Subscriber(address)
+    except (OSError, StreamError) as e:
+        print(f"Could not connect to {address}: {e}")
+        return 1
+    game.init_game()
+    pygame.display.set_caption("Aether Onslaught - Spectator")
+    state = GameState(0)
+    renderer = FullRenderer(game.display, game.background)
+    clock = pygame.time.Clock()
+    explosion_uid = 0
+    last_time = time.perf_counter()
+    try:
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    return 0
+            frame = subscriber.poll()
+            if frame is not None:
+                apply_frame(state, frame)
+            now = time.perf_counter()
+            game.particles.update(now - last_time)
+            last_time = now
+            explosion_uid = game.spawn_explosion_effects(state, explosion_uid)
+            renderer.begin()
+            game.draw_game(state, renderer, 1.0, game.particles)
+            renderer.present()
+            clock.tick(subscriber.fps or 60)
+    except (OSError, StreamError) as e:
+        print(f"Spectator stream ended: {e}")
+        return 0
+    finally:
+        subscriber.close()
+        pygame.quit()
+
+
+# Stream size per bench.py scenario, encoded exactly as Publisher does
+def measure_bandwidth(tick_rate=120):
+    from bench import SCENARIOS
+    from game_state import GameState, autopilot
+    for name, (setup, hook, ticks) in SCENARIOS.items():
+        state = GameState(1, tick_rate)
+        setup(state)
+        prev = None
+        total = 0
+        for tick in range(ticks):
+            if hook:
+                hook(state)
+            state.step(autopilot(state))
+            if tick % SEND_EVERY:
+                continue
+            sections = encode_frame(state)
+            keyframe = prev is None or (tick // SEND_EVERY) % KEYFRAME_INTERVAL == 0
+            total += MESSAGE.size + len(zlib.compress(pack_frame(sections, None if keyframe else prev)))
+            prev = sections
+        print(f"{name:<8} {total * tick_rate / ticks / 1024:6.2f} KB/s")
+
+
+if __name__ == "__main__":
+    if "--bandwidth" in sys.argv:
+        measure_bandwidth()
+    else:
+        sys.exit(watch(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_ADDRESS))